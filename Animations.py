@@ -2,32 +2,78 @@ import Bezier
 import numpy as np
 
 
-# Makes a list of points to move along, based off key points. There are two options available:
+# Makes a list of points to move along, based off key points. There are five options available:
 # 1. Linear movement
 # 2. Bezier curve movement
+# 3. Bezier curve movement at constant speed ('BEZIER_CONSTANT_SPEED')
+# 4. Spline movement ('SPLINE'), through all the key points
+# 5. Linear movement interpolated into exactly t frames ('LINE_INTERPOLATED'), shaped by easing
 # The first one is basic movement, which is broken into local movement and extended to fit the 1 animation per frame
 # format.
 # The second option uses the Bezier class to calculate those points, which are then broken into local movement
+# The third option does the same, but spaces the points evenly along the curve instead of evenly in time, so the
+# object doesn't speed up and slow down along the way.
+# The fourth option chains cubic bezier curves through the key points instead of making one big curve. key_points can
+# also be a Bezier.Spline, in which case only the segments whose key points changed since last time are recomputed.
+# The fifth option is like the first one, but gives exactly t evenly timed frames, see interpolate_linear_movement.
 # Why make those points into local movement? Well, it's more useful. You can't move the game object with a global
 # point animation, but you can do that with a local movement animation.
-def calculate_movement_points(t: int, key_points, curve_type: str):
+def calculate_movement_points(t: int, key_points, curve_type: str, easing="LINEAR"):
     if curve_type == "LINE":
         movement_points = extend_linear_movement(
             global_points_to_local_movement(key_points), t
         )
         return movement_points
+    elif curve_type == "LINE_INTERPOLATED":
+        movement_points = interpolate_linear_movement(
+            global_points_to_local_movement(key_points), t, easing
+        )
+        return movement_points
     elif curve_type == "BEZIER":
-        # Create a numpy range for the bezier function
-        t_points = np.arange(0, 1, 1 / t)
-        # Transform the key points into a numpy array
-        movement_points = np.array(key_points)
-        # Apply the bezier curve function to the array
-        movement_points = Bezier.curve(t_points, movement_points)
+        # Apply the bezier curve function to the key points, sampled at t evenly spaced moments
+        movement_points = Bezier.uniform_curve(t, key_points)
+        # Transform the points into local movement
+        movement_points = global_points_to_local_movement(movement_points)
+        return movement_points
+    elif curve_type == "BEZIER_CONSTANT_SPEED":
+        # Sample the bezier curve at t points evenly spaced along its length
+        movement_points = Bezier.constant_speed_curve(t, key_points)
+        # Transform the points into local movement
+        movement_points = global_points_to_local_movement(movement_points)
+        return movement_points
+    elif curve_type == "SPLINE":
+        if not isinstance(key_points, Bezier.Spline):
+            key_points = Bezier.Spline(key_points)
+        # Sample the spline at t points, split between its segments
+        movement_points = key_points.curve(t)
         # Transform the points into local movement
         movement_points = global_points_to_local_movement(movement_points)
         return movement_points
 
 
+# Returns a numeric NumPy array of the points, or None if they aren't a rectangular table of numbers (for example if
+# some of the values are strings or other objects). Used for the fast paths of the movement functions below.
+def numeric_array(points):
+    try:
+        # NumPy would quietly turn booleans among the numbers into 0s and 1s, but the per value loops keep them
+        # as they are, so tables with booleans have to go there
+        if not isinstance(points, np.ndarray) and any(
+            isinstance(value, (bool, np.bool_)) for value in np.asarray(points, dtype=object).flat
+        ):
+            return None
+        array = np.asarray(points)
+    except (ValueError, TypeError):
+        return None
+    if array.ndim != 2 or array.dtype.kind not in "iuf":
+        return None
+    return array
+
+
+# Returns whether the value can be used in movement arithmetic. Booleans don't count, NumPy numbers do.
+def is_number(value):
+    return isinstance(value, (int, float, np.number)) and not isinstance(value, (bool, np.bool_))
+
+
 # Transforms global points into local movement.
 # Example:
 # global points = [[0, 0], [10, 30], [0, 20], [-10, 0], [0, 0]]
@@ -35,6 +81,13 @@ def calculate_movement_points(t: int, key_points, curve_type: str):
 # Why make points into local movement? Well, it's more useful. You can't move the game object around with a global
 # point animation, but you can do that with a local movement animation.
 def global_points_to_local_movement(points):
+    # If the points are a plain table of numbers, we find all the differences in one go.
+    array = numeric_array(points)
+    if array is not None:
+        local_movement = np.diff(array, axis=0)
+        # The result keeps the type of the input, because the rest of the animation code works with lists.
+        return local_movement if isinstance(points, np.ndarray) else local_movement.tolist()
+
     final_points = []
 
     # Loop through all points aside from the last one
@@ -43,9 +96,7 @@ def global_points_to_local_movement(points):
         # Loop through all values inside the point (usually 2)
         for p in range(len(points[point])):
             # If both this point's value and the next point's value is an integer or a float
-            if type(points[point][p]) in [int, float] and type(
-                points[point + 1][p]
-            ) in [int, float]:
+            if is_number(points[point][p]) and is_number(points[point + 1][p]):
                 # We find the difference between them and save that value to next_point
                 next_point.append(points[point + 1][p] - points[point][p])
             # Otherwise,
@@ -75,13 +126,18 @@ def extend_linear_movement(points, t: int = 60):
     if time < 1:
         time = 1
 
+    # If the points are a plain table of numbers, we divide and repeat them all at once.
+    array = numeric_array(points)
+    if array is not None:
+        return np.repeat((array / time)[:, np.newaxis, :], time, axis=1).tolist()
+
     # Loop through the entire list of points
     for point in points:
         next_point = []
         # Loop through all the values of each point (usually 2)
         for p in point:
             # If we can divide that value,
-            if type(p) in [int, float]:
+            if is_number(p):
                 # we do, and append the result to the next_point list
                 next_point.append(p / time)
             # Otherwise,
@@ -99,6 +155,47 @@ def extend_linear_movement(points, t: int = 60):
     return final_points
 
 
+# Easing functions for interpolate_linear_movement. Each one maps progress through a movement (an array of numbers
+# from 0 to 1) to how far along the way the object should be at that moment.
+EASINGS = {
+    "LINEAR": lambda u: u,
+    "EASE_IN": lambda u: u * u,
+    "EASE_OUT": lambda u: 1 - (1 - u) * (1 - u),
+    "EASE_IN_OUT": lambda u: np.where(u < 0.5, 2 * u * u, 1 - 2 * (1 - u) * (1 - u)),
+    "CUBIC_IN": lambda u: u * u * u,
+    "CUBIC_OUT": lambda u: 1 - (1 - u) ** 3,
+    "CUBIC_IN_OUT": lambda u: np.where(u < 0.5, 4 * u ** 3, 1 - 4 * (1 - u) ** 3),
+}
+
+
+# Interpolates local movement linearly into exactly t frames of movement.
+# Example:
+# points = [[10, 20], [20, -10]]
+# points interpolated into 4 frames = [[5, 10], [5, 10], [10, -5], [10, -5]]
+# Unlike extend_linear_movement, the result always has exactly t frames, and is a flat list of frames which can be
+# passed straight to points_to_animation. Every movement takes the same amount of time, and the easing (a name from
+# EASINGS, or a function working on NumPy arrays) shapes how the object speeds up and slows down within each one.
+def interpolate_linear_movement(points, t: int = 60, easing="LINEAR"):
+    array = numeric_array(points)
+    if array is None:
+        raise TypeError("`points` Must be a list of points made of integers or floats .")
+    if isinstance(easing, str):
+        easing = EASINGS[easing]
+    if len(array) < 1 or t < 1:
+        return []
+
+    segments = len(array)
+    # Position at the start of each movement, counting from where the object started
+    positions = np.vstack((np.zeros((1, array.shape[1])), np.cumsum(array, axis=0)))
+    # Time of each frame boundary, in movements (so 1.5 is halfway through the second movement)
+    time = np.arange(t + 1) * segments / t
+    index = np.minimum(time.astype(int), segments - 1)
+    progress = easing(time - index)
+    frames = positions[index] + progress[:, np.newaxis] * array[index]
+
+    return np.diff(frames, axis=0).tolist()
+
+
 # Generates an empty animation shell
 # Example:
 # length = 3
@@ -150,3 +247,19 @@ def points_to_animation(points, replaced_values, values_operations, animations=(
             setattr(animations[i]['before'], replaced_values[j], value)
     # Convert back to tuple and return that
     return tuple(animations)
+
+
+# Converts movement points into tracks, one for each replaced value
+# Example:
+# points = [[10, 20], [20, -10], [-30, -10]]
+# replaced_values = ['x', 'y']
+# values__operations = ['+', '+']
+# returns (Track('x', [10, 20, -30], '+'), Track('y', [20, -10, -10], '+'))
+# The tracks do the same as the animations from points_to_animation, but go in the tracks of a game object, and take
+# a tiny fraction of the memory.
+def points_to_tracks(points, replaced_values, values_operations, loop: bool = True):
+    columns = np.asarray(points, dtype="float64").reshape(-1, len(replaced_values)).T
+    return tuple(
+        Track(replaced_values[j], columns[j], values_operations[j], loop=loop)
+        for j in range(len(replaced_values))
+    )
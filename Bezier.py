@@ -1,6 +1,13 @@
+import math
+import functools
 import numpy as np
 
 
+# How many basis matrices basis_matrix keeps around. Animations usually reuse only a handful of (degree, samples)
+# pairs, so this is plenty.
+BASIS_CACHE_SIZE = 128
+
+
 def two_points(t, p1, p2):
     if not isinstance(p1, np.ndarray) or not isinstance(p2, np.ndarray):
         raise TypeError("Points must be an instance of the numpy.ndarray!")
@@ -24,7 +31,40 @@ def get_point(t, points):
     return points[0]
 
 
-def curve(t_values, points):
+# Returns the Bernstein basis matrix of the given degree for all t values at once.
+# Row i holds the weights of every control point at t_values[i], so multiplying this matrix by the control points
+# gives the whole curve in one go.
+def bernstein_matrix(t_values, degree: int):
+    t = np.asarray(t_values, dtype="float64").reshape(-1, 1)
+    i = np.arange(degree + 1)
+    coefficients = np.array([math.comb(degree, k) for k in i], dtype="float64")
+    return coefficients * t ** i * (1 - t) ** (degree - i)
+
+
+# Returns the cached Bernstein basis matrix for `samples` evenly spaced t values.
+# endpoint: if True, t runs from 0 to 1 inclusive, otherwise 1 is left out (like np.arange(0, 1, 1 / samples)).
+# The matrix is read-only, because the same array is handed out to every caller.
+# Hit and miss counters are available through basis_matrix.cache_info().
+@functools.lru_cache(maxsize=BASIS_CACHE_SIZE)
+def basis_matrix(degree: int, samples: int, endpoint: bool = False):
+    if endpoint:
+        t_values = np.linspace(0, 1, samples)
+    else:
+        t_values = np.arange(samples) / samples
+    matrix = bernstein_matrix(t_values, degree)
+    matrix.setflags(write=False)
+    return matrix
+
+
+# Evaluates the curve for every t value in a single batch and returns an (N, D) ndarray.
+def evaluate(t_values, points):
+    points = np.asarray(points, dtype="float64")
+    if points.ndim != 2 or len(points) < 1:
+        raise TypeError("`points` Must be a 2D array of control points, of length greater than 0 .")
+    return bernstein_matrix(t_values, len(points) - 1) @ points
+
+
+def curve(t_values, points, as_list: bool = True):
     if not hasattr(t_values, "__iter__"):
         raise TypeError(
             "`t_values` Must be an ITERABLE of integers or floats, of length greater than 0 ."
@@ -38,11 +78,189 @@ def curve(t_values, points):
             "`t_values` Must be an iterable of INTEGERS OR FLOATS, of length greater than 0 ."
         )
 
-    curve = np.array([[0.0] * len(points[0])])
-    for t in t_values:
-        curve = np.append(curve, [get_point(t, points)], axis=0)
-    curve = np.delete(curve, 0, 0)
+    curve = evaluate(t_values, points)
+
+    # Lists are kept as the default output, because the rest of the animation code expects them.
+    if as_list:
+        curve = curve.tolist()
+
+    return curve
+
 
-    curve = curve.tolist()
+# Samples the curve at `samples` evenly spaced t values, using the cached basis matrix.
+def uniform_curve(samples: int, points, endpoint: bool = False, as_list: bool = True):
+    points = np.asarray(points, dtype="float64")
+    if points.ndim != 2 or len(points) < 1:
+        raise TypeError("`points` Must be a 2D array of control points, of length greater than 0 .")
+
+    curve = basis_matrix(len(points) - 1, int(samples), bool(endpoint)) @ points
+
+    if as_list:
+        curve = curve.tolist()
 
     return curve
+
+
+# Builds the arc length lookup table of the curve: `samples` t values from 0 to 1, and the length of the curve from
+# its start up to each of them. Build it once per curve and pass it to t_at_lengths or constant_speed_curve.
+def arc_length_table(points, samples: int = 256):
+    points = np.asarray(points, dtype="float64")
+    t_values = np.linspace(0, 1, samples)
+    curve = basis_matrix(len(points) - 1, int(samples), True) @ points
+    segment_lengths = np.linalg.norm(np.diff(curve, axis=0), axis=1)
+    lengths = np.concatenate(([0.0], np.cumsum(segment_lengths)))
+    return t_values, lengths
+
+
+# Maps distances along the curve to t values, by binary searching the lookup table and interpolating linearly
+# between its neighbouring entries.
+def t_at_lengths(distances, table):
+    t_values, lengths = table
+    distances = np.clip(np.asarray(distances, dtype="float64"), 0, lengths[-1])
+
+    upper = np.clip(np.searchsorted(lengths, distances, side="left"), 1, len(lengths) - 1)
+    lower = upper - 1
+    span = lengths[upper] - lengths[lower]
+    # Zero length spans (repeated control points) would divide by zero, so they just map to their lower t.
+    fraction = np.divide(
+        distances - lengths[lower], span, out=np.zeros_like(distances), where=span > 0
+    )
+    return t_values[lower] + fraction * (t_values[upper] - t_values[lower])
+
+
+# Samples the curve at `samples` points evenly spaced by distance, so an object moving along them has constant speed.
+# endpoint works the same as in uniform_curve.
+def constant_speed_curve(samples: int, points, endpoint: bool = False, table=None, as_list: bool = True):
+    points = np.asarray(points, dtype="float64")
+    if points.ndim != 2 or len(points) < 1:
+        raise TypeError("`points` Must be a 2D array of control points, of length greater than 0 .")
+    if table is None:
+        table = arc_length_table(points)
+
+    total_length = table[1][-1]
+    if endpoint:
+        distances = np.linspace(0, total_length, samples)
+    else:
+        distances = np.arange(samples) / samples * total_length
+
+    curve = evaluate(t_at_lengths(distances, table), points)
+
+    if as_list:
+        curve = curve.tolist()
+
+    return curve
+
+
+# Splits the curve at t into two curves with the same degree, using De Casteljau's construction.
+# Returns the control points of the left part and of the right part.
+def split(points, t: float = 0.5):
+    points = np.asarray(points, dtype="float64")
+    left = [points[0]]
+    right = [points[-1]]
+    while len(points) > 1:
+        points = (1 - t) * points[:-1] + t * points[1:]
+        left.append(points[0])
+        right.append(points[-1])
+    return np.array(left), np.array(right[::-1])
+
+
+# Returns the largest distance between the inner control points and the segment from the first to the last one.
+# The curve never strays further from that segment than its control points do, so this bounds the flattening error.
+def flatness(points):
+    points = np.asarray(points, dtype="float64")
+    start = points[0]
+    chord = points[-1] - start
+    offsets = points[1:-1] - start
+    chord_length_squared = np.dot(chord, chord)
+    if chord_length_squared > 0:
+        projections = np.clip(offsets @ chord / chord_length_squared, 0, 1)
+        offsets = offsets - np.outer(projections, chord)
+    if len(offsets) == 0:
+        return 0.0
+    return float(np.sqrt(np.max(np.sum(offsets * offsets, axis=1))))
+
+
+# Turns the curve into a polyline, subdividing only where it bends more than `tolerance` (in pixels) away from a
+# straight line. Flat stretches end up with few vertices and sharp bends with many, which keeps polygons built from
+# curves (hit boxes, debug drawing) small. Returns an (M, D) ndarray that includes both end points.
+def flatten(points, tolerance: float = 0.5, max_depth: int = 16):
+    points = np.asarray(points, dtype="float64")
+    if points.ndim != 2 or len(points) < 1:
+        raise TypeError("`points` Must be a 2D array of control points, of length greater than 0 .")
+    if tolerance <= 0:
+        raise ValueError("`tolerance` Must be greater than 0 .")
+
+    vertices = [points[0]]
+
+    def subdivide(part, depth):
+        if depth >= max_depth or flatness(part) <= tolerance:
+            vertices.append(part[-1])
+        else:
+            left, right = split(part)
+            subdivide(left, depth + 1)
+            subdivide(right, depth + 1)
+
+    subdivide(points, 0)
+    return np.array(vertices)
+
+
+# Composite curve made of cubic bezier segments chained through the key points (a Catmull-Rom spline).
+# Unlike a single bezier through all key points, each segment only depends on the 4 key points around it, so the cost
+# grows linearly with the number of key points, and changing a key point only recomputes the segments around it.
+class Spline(object):
+    # key_points: the points the spline passes through, in order. At least 2 of them.
+    def __init__(self, key_points):
+        self.key_points = np.array(key_points, dtype="float64")
+        if self.key_points.ndim != 2 or len(self.key_points) < 2:
+            raise TypeError("`key_points` Must be a 2D array of points, of length greater than 1 .")
+        # Cached samples of each segment: segment index -> (control points, samples, sampled points)
+        self.segment_cache = {}
+
+    # Number of cubic segments in the spline.
+    def segment_count(self):
+        return len(self.key_points) - 1
+
+    # Moves one key point. Only the (up to 4) segments that depend on it will be recomputed.
+    def set_point(self, index: int, point):
+        self.key_points[index] = point
+
+    # Returns the 4 cubic bezier control points of segment i, converted from the Catmull-Rom form. The first and last
+    # key points are repeated at the ends of the spline.
+    def segment_control_points(self, i: int):
+        last = len(self.key_points) - 1
+        p0 = self.key_points[max(i - 1, 0)]
+        p1 = self.key_points[i]
+        p2 = self.key_points[i + 1]
+        p3 = self.key_points[min(i + 2, last)]
+        return np.array([p1, p1 + (p2 - p0) / 6, p2 - (p3 - p1) / 6, p2])
+
+    # Returns `samples` points of segment i, leaving out its end point (which is the start of the next segment).
+    # The result is cached, and only recomputed if the segment's control points or the sample count changed.
+    def segment(self, i: int, samples: int):
+        control_points = self.segment_control_points(i)
+        cached = self.segment_cache.get(i)
+        if cached is not None and cached[1] == samples and np.array_equal(cached[0], control_points):
+            return cached[2]
+
+        points = uniform_curve(samples, control_points, as_list=False)
+        self.segment_cache[i] = (control_points, samples, points)
+        return points
+
+    # Samples the whole spline into `samples` points, the last one being the last key point. The samples are split as
+    # evenly as possible between the segments.
+    def curve(self, samples: int, as_list: bool = True):
+        segments = self.segment_count()
+        base, extra = divmod(max(int(samples) - 1, 0), segments)
+
+        parts = []
+        for i in range(segments):
+            segment_samples = base + (1 if i < extra else 0)
+            if segment_samples > 0:
+                parts.append(self.segment(i, segment_samples))
+        parts.append(self.key_points[-1:])
+        curve = np.concatenate(parts)
+
+        if as_list:
+            curve = curve.tolist()
+
+        return curve
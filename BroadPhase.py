@@ -0,0 +1,398 @@
+import numpy as np
+
+
+# Returns the extents of every bounding box as an (N, 4) array of min x, min y, max x, max y.
+# bounding_boxes: iterable of bounding boxes, each one being the corner points of the box (like
+# GameObject.bounding_box).
+def box_extents(bounding_boxes):
+    extents = []
+    for box in bounding_boxes:
+        xs = [point[0] for point in box]
+        ys = [point[1] for point in box]
+        extents.append((min(xs), min(ys), max(xs), max(ys)))
+    return np.array(extents, dtype="float64").reshape(-1, 4)
+
+
+# Returns which of the pairs (an (M, 2) array of indexes into extents) have overlapping boxes. Touching boxes count as
+# overlapping.
+def overlapping(extents, pairs):
+    a = extents[pairs[:, 0]]
+    b = extents[pairs[:, 1]]
+    return (a[:, 0] <= b[:, 2]) & (b[:, 0] <= a[:, 2]) & (a[:, 1] <= b[:, 3]) & (b[:, 1] <= a[:, 3])
+
+
+# Returns the pairs of indexes (i, j), i < j, of all the boxes that overlap, as an (M, 2) array in increasing order.
+# Checks every pair, so it's only meant for when there is no broad phase, but goes through the boxes a block of rows
+# at a time, so it never holds more than about max_block pairs in memory.
+def all_overlapping_pairs(extents, max_block: int = 1 << 20):
+    count = len(extents)
+    rows = max(1, max_block // max(count, 1))
+    pairs = [np.empty((0, 2), dtype="int64")]
+    for start in range(0, count, rows):
+        block = extents[start:start + rows]
+        hits = (
+            (block[:, np.newaxis, 0] <= extents[np.newaxis, :, 2])
+            & (extents[np.newaxis, :, 0] <= block[:, np.newaxis, 2])
+            & (block[:, np.newaxis, 1] <= extents[np.newaxis, :, 3])
+            & (extents[np.newaxis, :, 1] <= block[:, np.newaxis, 3])
+        )
+        i, j = np.nonzero(hits)
+        i += start
+        upper = i < j
+        pairs.append(np.stack((i[upper], j[upper]), axis=1))
+    return np.concatenate(pairs)
+
+
+# Broad phase which puts every object into the cells of a uniform grid that its bounding box covers, and only pairs
+# up objects sharing a cell. Works best when objects are about the size of a cell or smaller.
+class SpatialHash(object):
+    # cell_size: width and height of a cell, in pixels.
+    def __init__(self, cell_size: float = 100.0):
+        self.cell_size = cell_size
+        self.cells = {}
+        # Statistics of the last call to pairs
+        self.stats = {"objects": 0, "cells": 0, "candidate_pairs": 0, "pairs": 0}
+
+    # Rebuilds the grid from the bounding boxes of the objects.
+    def build(self, objects):
+        extents = box_extents(obj.bounding_box for obj in objects)
+        cell_extents = np.floor(extents / self.cell_size).astype("int64")
+        self.cells = {}
+        for i, (min_x, min_y, max_x, max_y) in enumerate(cell_extents.tolist()):
+            for cell_x in range(min_x, max_x + 1):
+                for cell_y in range(min_y, max_y + 1):
+                    self.cells.setdefault((cell_x, cell_y), []).append(i)
+        return extents
+
+    # Returns the pairs of indexes (i, j), i < j, of objects whose bounding boxes overlap, in increasing order.
+    def pairs(self, objects):
+        extents = self.build(objects)
+        candidates = set()
+        for indexes in self.cells.values():
+            for a in range(len(indexes)):
+                for b in range(a + 1, len(indexes)):
+                    candidates.add((indexes[a], indexes[b]))
+
+        candidates = np.array(sorted(candidates), dtype="int64").reshape(-1, 2)
+        pairs = candidates[overlapping(extents, candidates)]
+
+        self.stats = {
+            "objects": len(extents),
+            "cells": len(self.cells),
+            "candidate_pairs": len(candidates),
+            "pairs": len(pairs),
+        }
+        return [tuple(pair) for pair in pairs.tolist()]
+
+
+# Broad phase which sorts the objects along an axis and sweeps over them, only pairing up objects whose intervals on
+# that axis overlap. The sorted order is kept between calls and fixed with an insertion sort, which is almost free
+# when objects only move a little every frame. Handles long, thin and clustered objects better than a grid.
+class SweepAndPrune(object):
+    # axis: 'x' or 'y' to always sweep along that axis, or 'AUTO' to keep both sorted, and sweep along the one the
+    # objects are more spread out on.
+    def __init__(self, axis: str = 'x'):
+        self.axis = axis
+        # Object indexes sorted by the start of their interval on each axis
+        self.orders = {'x': [], 'y': []}
+        # Statistics of the last call to pairs
+        self.stats = {"objects": 0, "swaps": 0, "candidate_pairs": 0, "pairs": 0}
+
+    # Sorts the order of indexes by keys, in place. If the number of objects changed, the order is sorted from scratch.
+    # Returns the number of swaps done.
+    @staticmethod
+    def insertion_sort(order, keys):
+        if len(order) != len(keys):
+            order[:] = np.argsort(keys, kind="stable").tolist()
+            return 0
+
+        keys = keys.tolist()
+        swaps = 0
+        for i in range(1, len(order)):
+            index = order[i]
+            key = keys[index]
+            j = i - 1
+            while j >= 0 and keys[order[j]] > key:
+                order[j + 1] = order[j]
+                j -= 1
+                swaps += 1
+            order[j + 1] = index
+        return swaps
+
+    # Returns the pairs of indexes (i, j), i < j, of objects whose bounding boxes overlap, in increasing order.
+    def pairs(self, objects):
+        extents = box_extents(obj.bounding_box for obj in objects)
+
+        if self.axis == 'AUTO':
+            axes = ('x', 'y')
+        else:
+            axes = (self.axis,)
+        swaps = 0
+        for axis in axes:
+            swaps += SweepAndPrune.insertion_sort(self.orders[axis], extents[:, 0 if axis == 'x' else 1])
+
+        axis = axes[0]
+        if len(axes) == 2 and len(extents):
+            centers = (extents[:, :2] + extents[:, 2:]) / 2
+            if np.var(centers[:, 1]) > np.var(centers[:, 0]):
+                axis = 'y'
+
+        # Sweep along the axis, keeping the objects whose interval hasn't ended yet
+        start, end = (0, 2) if axis == 'x' else (1, 3)
+        bounds = extents.tolist()
+        active = []
+        candidates = []
+        for i in self.orders[axis]:
+            box_start = bounds[i][start]
+            active = [j for j in active if bounds[j][end] >= box_start]
+            for j in active:
+                candidates.append((i, j) if i < j else (j, i))
+            active.append(i)
+
+        candidates = np.array(sorted(candidates), dtype="int64").reshape(-1, 2)
+        pairs = candidates[overlapping(extents, candidates)]
+
+        self.stats = {
+            "objects": len(extents),
+            "swaps": swaps,
+            "candidate_pairs": len(candidates),
+            "pairs": len(pairs),
+        }
+        return [tuple(pair) for pair in pairs.tolist()]
+
+
+def union(a, b):
+    return [min(a[0], b[0]), min(a[1], b[1]), max(a[2], b[2]), max(a[3], b[3])]
+
+
+def perimeter(box):
+    return 2 * (box[2] - box[0] + box[3] - box[1])
+
+
+def boxes_overlap(a, b):
+    return a[0] <= b[2] and b[0] <= a[2] and a[1] <= b[3] and b[1] <= a[3]
+
+
+def box_contains(outer, inner):
+    return outer[0] <= inner[0] and outer[1] <= inner[1] and inner[2] <= outer[2] and inner[3] <= outer[3]
+
+
+# Dynamic bounding volume tree: a binary tree of boxes, each one containing the boxes of its children, with one item
+# in every leaf. Finding everything overlapping a box only visits the branches overlapping it.
+# Boxes are lists of min x, min y, max x, max y.
+class AABBTree(object):
+    def __init__(self):
+        self.root = None
+        # Nodes are stored as indexes into these lists
+        self.boxes = []
+        self.parents = []
+        self.lefts = []
+        self.rights = []
+        self.items = []
+        self.free_nodes = []
+
+    def new_node(self, box, item=None):
+        if self.free_nodes:
+            node = self.free_nodes.pop()
+            self.boxes[node] = box
+            self.parents[node] = None
+            self.lefts[node] = None
+            self.rights[node] = None
+            self.items[node] = item
+        else:
+            node = len(self.boxes)
+            self.boxes.append(box)
+            self.parents.append(None)
+            self.lefts.append(None)
+            self.rights.append(None)
+            self.items.append(item)
+        return node
+
+    def is_leaf(self, node):
+        return self.lefts[node] is None
+
+    # Recomputes the boxes of node and all its ancestors from their children.
+    def refit(self, node):
+        while node is not None:
+            self.boxes[node] = union(self.boxes[self.lefts[node]], self.boxes[self.rights[node]])
+            node = self.parents[node]
+
+    # Adds an item with the given box, and returns its leaf node.
+    def insert(self, box, item):
+        leaf = self.new_node(list(box), item)
+        if self.root is None:
+            self.root = leaf
+            return leaf
+
+        # Walk down to the node which grows the least (by perimeter) by taking in the new box
+        node = self.root
+        while not self.is_leaf(node):
+            combined = perimeter(union(self.boxes[node], box))
+            cost_here = 2 * combined
+            inherited = 2 * (combined - perimeter(self.boxes[node]))
+
+            costs = []
+            for child in (self.lefts[node], self.rights[node]):
+                cost = perimeter(union(self.boxes[child], box))
+                if not self.is_leaf(child):
+                    cost -= perimeter(self.boxes[child])
+                costs.append(cost + inherited)
+
+            if cost_here < min(costs):
+                break
+            node = self.lefts[node] if costs[0] < costs[1] else self.rights[node]
+
+        # Put a new parent in place of that node, holding both it and the new leaf
+        old_parent = self.parents[node]
+        parent = self.new_node(union(self.boxes[node], box))
+        self.parents[parent] = old_parent
+        self.lefts[parent] = node
+        self.rights[parent] = leaf
+        self.parents[node] = parent
+        self.parents[leaf] = parent
+        if old_parent is None:
+            self.root = parent
+        else:
+            if self.lefts[old_parent] == node:
+                self.lefts[old_parent] = parent
+            else:
+                self.rights[old_parent] = parent
+            self.refit(old_parent)
+        return leaf
+
+    # Removes a leaf node returned by insert.
+    def remove(self, leaf):
+        self.items[leaf] = None
+        self.free_nodes.append(leaf)
+        if leaf == self.root:
+            self.root = None
+            return
+
+        parent = self.parents[leaf]
+        sibling = self.rights[parent] if self.lefts[parent] == leaf else self.lefts[parent]
+        grandparent = self.parents[parent]
+        self.free_nodes.append(parent)
+        self.parents[sibling] = grandparent
+        if grandparent is None:
+            self.root = sibling
+        else:
+            if self.lefts[grandparent] == parent:
+                self.lefts[grandparent] = sibling
+            else:
+                self.rights[grandparent] = sibling
+            self.refit(grandparent)
+
+    # Returns the leaf nodes whose boxes overlap the box.
+    def query(self, box):
+        leaves = []
+        stack = [self.root] if self.root is not None else []
+        while stack:
+            node = stack.pop()
+            if boxes_overlap(self.boxes[node], box):
+                if self.is_leaf(node):
+                    leaves.append(node)
+                else:
+                    stack.append(self.lefts[node])
+                    stack.append(self.rights[node])
+        return leaves
+
+
+# Broad phase for scenes with many objects that never move (walls, floors) and some that do. Static objects go into
+# their own tree once, and are never paired with each other. Moving objects go into a second tree with boxes fattened
+# by margin, and are only re-inserted when they leave their fattened box.
+class BoundingVolumeTree(object):
+    # static_objects: objects that don't move. If one of them does move (for example because it was pushed by a
+    # collision), call refresh_static with it. Give them a high weight to keep collisions from pushing them.
+    # margin: how far, in pixels, the boxes of moving objects are fattened.
+    def __init__(self, static_objects=(), margin: float = 10.0):
+        self.margin = margin
+        self.static_tree = AABBTree()
+        self.dynamic_tree = AABBTree()
+        # id of object -> (object, leaf node, tight box)
+        self.static_leaves = {}
+        self.dynamic_leaves = {}
+        for obj in static_objects:
+            self.add_static(obj)
+        # Statistics of the last call to pairs
+        self.stats = {"objects": 0, "reinserted": 0, "candidate_pairs": 0, "pairs": 0}
+
+    def add_static(self, obj):
+        box = box_extents([obj.bounding_box])[0].tolist()
+        self.static_leaves[id(obj)] = (obj, self.static_tree.insert(box, obj), box)
+
+    def remove_static(self, obj):
+        _, leaf, _ = self.static_leaves.pop(id(obj))
+        self.static_tree.remove(leaf)
+
+    def refresh_static(self, obj):
+        self.remove_static(obj)
+        self.add_static(obj)
+
+    # Returns whether the object is one of the static objects, whose boxes are always up to date.
+    def is_static(self, obj):
+        return id(obj) in self.static_leaves
+
+    # Brings the tree of moving objects up to date with their bounding boxes. Returns how many were re-inserted.
+    def update_dynamic(self, objects):
+        dynamic = [obj for obj in objects if id(obj) not in self.static_leaves]
+        present = set(id(obj) for obj in dynamic)
+        for key in [key for key in self.dynamic_leaves if key not in present]:
+            self.dynamic_tree.remove(self.dynamic_leaves.pop(key)[1])
+
+        reinserted = 0
+        boxes = box_extents(obj.bounding_box for obj in dynamic).tolist()
+        for obj, box in zip(dynamic, boxes):
+            entry = self.dynamic_leaves.get(id(obj))
+            if entry is not None and box_contains(self.dynamic_tree.boxes[entry[1]], box):
+                self.dynamic_leaves[id(obj)] = (obj, entry[1], box)
+                continue
+            if entry is not None:
+                self.dynamic_tree.remove(entry[1])
+            fat_box = [box[0] - self.margin, box[1] - self.margin, box[2] + self.margin, box[3] + self.margin]
+            self.dynamic_leaves[id(obj)] = (obj, self.dynamic_tree.insert(fat_box, obj), box)
+            reinserted += 1
+        return reinserted
+
+    # Returns the pairs of indexes (i, j), i < j, of objects whose bounding boxes overlap, in increasing order. Pairs
+    # of two static objects are never returned.
+    def pairs(self, objects):
+        reinserted = self.update_dynamic(objects)
+        indexes = {id(obj): i for i, obj in enumerate(objects)}
+
+        candidates = 0
+        pairs = set()
+        for key, (obj, leaf, box) in self.dynamic_leaves.items():
+            i = indexes[key]
+            for tree, leaves in ((self.dynamic_tree, self.dynamic_leaves), (self.static_tree, self.static_leaves)):
+                for other_leaf in tree.query(box):
+                    other_key = id(tree.items[other_leaf])
+                    j = indexes.get(other_key)
+                    if j is None or j == i:
+                        continue
+                    candidates += 1
+                    if boxes_overlap(box, leaves[other_key][2]):
+                        pairs.add((i, j) if i < j else (j, i))
+
+        self.stats = {
+            "objects": len(objects),
+            "reinserted": reinserted,
+            "candidate_pairs": candidates,
+            "pairs": len(pairs),
+        }
+        return sorted(pairs)
+
+    # Returns the objects (static and moving) whose bounding boxes overlap the rectangle. Moving objects are as of the
+    # last call to pairs or update_dynamic.
+    # rect: min x, min y, max x, max y
+    def query_rect(self, rect):
+        found = []
+        for tree, leaves in ((self.static_tree, self.static_leaves), (self.dynamic_tree, self.dynamic_leaves)):
+            for leaf in tree.query(rect):
+                obj = tree.items[leaf]
+                if boxes_overlap(leaves[id(obj)][2], rect):
+                    found.append(obj)
+        return found
+
+    # Returns the objects whose bounding boxes contain the point.
+    def query_point(self, x: float, y: float):
+        return self.query_rect((x, y, x, y))
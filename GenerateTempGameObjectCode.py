@@ -22,24 +22,26 @@ print(object_methods)
 print(new_object_variables)
 
 with open('TempGameObject.py', 'w') as f:
+    f.write('NOT_GIVEN = object()\n')
+    f.write('\n')
+    f.write('\n')
     f.write('class TempGameObject(GameObject):\n')
+    for var in new_object_variables:
+        f.write('    ' + var + ' = ' + ("''" if hasattr(instance_object, var) else "'+'") + '\n')
+    f.write('    initialized = False\n')
+    f.write('\n')
     f.write('    def __init__(\n')
     f.write('            self,\n')
     for var in new_object_variables:
-        f.write('            ' + var + "='")
+        f.write('            ' + var + '=NOT_GIVEN,')
         if hasattr(instance_object, var):
-            f.write("',               # " + str(type(getattr(instance_object, var))).replace("<class '", '').replace("'>", ''))
-        else:
-            f.write("+',")
+            f.write('               # ' + str(type(getattr(instance_object, var))).replace("<class '", '').replace("'>", ''))
         f.write('\n')
     f.write('    ):\n')
 
-    for var in new_object_variables:
-        f.write('        self.' + var + ' = ' + var)
-
-        f.write('\n')
-    f.write('\n')
-    f.write('        self.initialized = False\n')
+    f.write('        for name, value in locals().items():\n')
+    f.write("            if name != 'self' and value is not NOT_GIVEN:\n")
+    f.write('                setattr(self, name, value)\n')
 
     f.close()
 
@@ -1,8 +1,10 @@
 import pygame
 import math
+import collections
 import numpy as np
 import Polygon
 import Bezier
+import BroadPhase
 
 
 class Events:
@@ -19,10 +21,9 @@ class Events:
         )
 
         obj.play_animation = False
+        # Move on to the next animation. The animations themselves aren't touched, so they can be shared between objects.
         if obj.animations:
-            animations = list(obj.animations)
-            animations.append(animations.pop(0))
-            obj.animations = tuple(animations)
+            obj.animation_index = (obj.animation_index + 1) % len(obj.animations)
 
     @staticmethod
     def animate_end(obj, kwargs: dict, **dump):
@@ -113,6 +114,9 @@ class Events:
 
 
 class Func(object):
+    # Animations make a lot of these, so they don't get a __dict__
+    __slots__ = ("func", "kwargs")
+
     def __init__(self, func, kwargs: dict = None):
         if kwargs is None:
             kwargs = {}
@@ -129,32 +133,291 @@ class Func(object):
         self.func(obj=obj, kwargs=kwargs)
 
 
+# Compact animation of a single game object variable. Instead of a Func and two TempGameObjects per frame, a track keeps
+# one array of frame numbers and one array of values, and applies them to the object straight from GameObject.animate.
+class Track(object):
+    # attribute: name of the game object variable the track changes, e.g. 'x'
+    # values: the value applied on each key frame. Numbers, or rows of numbers for tuple variables like hit_box_color.
+    # operation: how the values are applied to the variable, same as the _operation variables of TempGameObject
+    # ('+', '*', '=', 'extend', 'replace')
+    # times: the frame on which each value is applied, in increasing order. If left out, value i is applied on frame i.
+    # loop: whether the track starts over after its last key frame.
+    def __init__(self, attribute: str, values, operation: str = '+', times=None, loop: bool = True):
+        self.attribute = attribute
+        self.values = np.asarray(values, dtype="float64")
+        self.operation = operation
+        if times is None:
+            self.times = None
+            self.length = len(self.values)
+        else:
+            self.times = np.asarray(times, dtype="int64")
+            if len(self.times) != len(self.values):
+                raise ValueError("`times` Must have the same length as `values` .")
+            self.length = int(self.times[-1]) + 1 if len(self.times) else 0
+        self.loop = loop
+
+    # Returns the index of the value applied on the given frame, or None if the frame isn't a key frame.
+    def index_at(self, frame: int):
+        if self.length == 0:
+            return None
+        if self.loop:
+            frame %= self.length
+        elif frame >= self.length:
+            return None
+
+        # Dense tracks have a value on every frame
+        if self.times is None:
+            return frame
+        index = int(np.searchsorted(self.times, frame))
+        if index < len(self.times) and self.times[index] == frame:
+            return index
+        return None
+
+    # Like index_at, but for an array of frames at once. Returns a boolean array telling which frames are key frames,
+    # and the values of those key frames.
+    def values_at(self, frames):
+        frames = np.asarray(frames, dtype="int64")
+        if self.length == 0:
+            return np.zeros(len(frames), dtype=bool), self.values[:0]
+        if self.loop:
+            frames = frames % self.length
+            keyed = np.ones(len(frames), dtype=bool)
+        else:
+            keyed = frames < self.length
+
+        if self.times is None:
+            return keyed, self.values[frames[keyed]]
+        indexes = np.minimum(np.searchsorted(self.times, frames), len(self.times) - 1)
+        keyed &= self.times[indexes] == frames
+        return keyed, self.values[indexes[keyed]]
+
+    # Applies the value of the given frame (if there is one) to the object.
+    def apply(self, obj, frame: int):
+        index = self.index_at(frame)
+        if index is None:
+            return
+        if self.values.ndim == 1:
+            value = self.values[index].item()
+        else:
+            value = tuple(self.values[index].tolist())
+        setattr(
+            obj,
+            self.attribute,
+            GameObject.evaluate_operation_between_different_types(
+                getattr(obj, self.attribute), value, self.operation
+            ),
+        )
+
+
+# Animation made of tracks, which doesn't change while playing. Any number of game objects can play the same clip at
+# once, each one keeping its own Playback.
+class Clip(object):
+    # tracks: iterable of Track objects, played together. The clip lasts as long as its longest track.
+    def __init__(self, tracks):
+        self.tracks = tuple(tracks)
+        for track in self.tracks:
+            track.values.setflags(write=False)
+        self.length = max((track.length for track in self.tracks), default=0)
+
+
+# A game object's position in a clip.
+class Playback(object):
+    # clip: the (possibly shared) Clip to play
+    # loop_mode: 'LOOP' to start over after the last frame, 'ONCE' to stop there
+    # frame: the frame of the clip to play next
+    def __init__(self, clip, loop_mode: str = 'LOOP', frame: int = 0):
+        self.clip = clip
+        self.loop_mode = loop_mode
+        self.frame = frame
+        self.finished = False
+
+    # Applies the current frame of the clip to the object and moves on to the next one.
+    def advance(self, obj):
+        if self.finished or self.clip.length == 0:
+            return
+        for track in self.clip.tracks:
+            track.apply(obj, self.frame)
+        self.frame += 1
+        if self.frame >= self.clip.length:
+            if self.loop_mode == 'LOOP':
+                self.frame = 0
+            else:
+                self.finished = True
+
+
+# Plays clips on many game objects at once. Instead of every object advancing its own playbacks in GameObject.animate,
+# the system keeps the frames of all playbacks in arrays, and advances everything playing the same clip in one go.
+# Call update once per frame, next to update_objects.
+class AnimationSystem(object):
+    # Operations that can be applied to a whole array of values at once. Anything else goes through Track.apply.
+    BATCH_OPERATIONS = {
+        '+': np.add,
+        '*': np.multiply,
+        '=': lambda current, values: values,
+    }
+
+    def __init__(self):
+        self.objects = []
+        self.clips = []
+        self.frames = np.zeros(0, dtype="int64")
+        self.looping = np.zeros(0, dtype=bool)
+        self.active = np.zeros(0, dtype=bool)
+        # Indexes of the playbacks of each clip, rebuilt whenever playbacks are added or removed
+        self.groups = None
+
+    # Starts playing the clip on the object.
+    # loop_mode: 'LOOP' to start over after the last frame, 'ONCE' to stop there
+    # frame: the frame of the clip to start on
+    def play(self, obj, clip, loop_mode: str = 'LOOP', frame: int = 0):
+        self.objects.append(obj)
+        self.clips.append(clip)
+        self.frames = np.append(self.frames, frame)
+        self.looping = np.append(self.looping, loop_mode == 'LOOP')
+        self.active = np.append(self.active, True)
+        self.groups = None
+
+    # Stops all the clips playing on the object.
+    def stop(self, obj):
+        for i in range(len(self.objects)):
+            if self.objects[i] is obj:
+                self.active[i] = False
+
+    # Removes stopped and finished playbacks from the arrays.
+    def remove_inactive(self):
+        keep = np.flatnonzero(self.active)
+        self.objects = [self.objects[i] for i in keep]
+        self.clips = [self.clips[i] for i in keep]
+        self.frames = self.frames[keep]
+        self.looping = self.looping[keep]
+        self.active = self.active[keep]
+        self.groups = None
+
+    # Groups the playbacks by clip. Each group also tells whether an object plays the clip more than once.
+    def build_groups(self):
+        groups = {}
+        for i in range(len(self.clips)):
+            groups.setdefault(id(self.clips[i]), (self.clips[i], []))[1].append(i)
+        self.groups = [
+            (clip, np.array(indexes, dtype="int64"), len(set(id(self.objects[i]) for i in indexes)) != len(indexes))
+            for clip, indexes in groups.values()
+        ]
+
+    # Applies the current frame of every playback to its object, and moves all of them on to the next frame.
+    def update(self):
+        if not self.active.all():
+            self.remove_inactive()
+        if self.groups is None:
+            self.build_groups()
+
+        for clip, indexes, repeated in self.groups:
+            frames = self.frames[indexes]
+            for track in clip.tracks:
+                keyed, values = track.values_at(frames)
+                objects = [self.objects[i] for i in indexes[keyed]]
+                operation = AnimationSystem.BATCH_OPERATIONS.get(track.operation)
+                # An object playing the clip more than once has to get every one of the changes, one after another,
+                # like with its own playbacks, while a whole array operation would only keep one of them.
+                if operation is None or values.ndim != 1 or repeated:
+                    for obj, frame in zip(objects, frames[keyed].tolist()):
+                        track.apply(obj, frame)
+                    continue
+                # Objects stored in the same World are changed directly in its arrays
+                world = getattr(objects[0], "world", None) if objects else None
+                if (
+                    world is not None
+                    and track.attribute in World.FIELDS
+                    and all(getattr(obj, "world", None) is world for obj in objects)
+                ):
+                    rows = np.fromiter((obj.world_index for obj in objects), dtype="int64", count=len(objects))
+                    array = world.arrays[track.attribute]
+                    array[rows] = operation(array[rows], values)
+                    continue
+                current = np.fromiter(
+                    (getattr(obj, track.attribute) for obj in objects), dtype="float64", count=len(objects)
+                )
+                for obj, value in zip(objects, operation(current, values).tolist()):
+                    setattr(obj, track.attribute, value)
+
+            # Move on to the next frame, starting over or stopping at the end of the clip
+            frames += 1
+            ended = frames >= clip.length
+            frames[ended & self.looping[indexes]] = 0
+            self.frames[indexes] = frames
+            self.active[indexes[ended & ~self.looping[indexes]]] = False
+
+
 class Animations:
-    # Makes a list of points to move along, based off key points. There are two options available:
+    # Makes a list of points to move along, based off key points. There are five options available:
     # 1. Linear movement
     # 2. Bezier curve movement
+    # 3. Bezier curve movement at constant speed ('BEZIER_CONSTANT_SPEED')
+    # 4. Spline movement ('SPLINE'), through all the key points
+    # 5. Linear movement interpolated into exactly t frames ('LINE_INTERPOLATED'), shaped by easing
     # The first one is basic movement, which is broken into local movement and extended to fit the 1 animation per frame
     # format.
     # The second option uses the Bezier class to calculate those points, which are then broken into local movement
+    # The third option does the same, but spaces the points evenly along the curve instead of evenly in time, so the
+    # object doesn't speed up and slow down along the way.
+    # The fourth option chains cubic bezier curves through the key points instead of making one big curve. key_points can
+    # also be a Bezier.Spline, in which case only the segments whose key points changed since last time are recomputed.
+    # The fifth option is like the first one, but gives exactly t evenly timed frames, see interpolate_linear_movement.
     # Why make those points into local movement? Well, it's more useful. You can't move the game object with a global
     # point animation, but you can do that with a local movement animation.
     @staticmethod
-    def calculate_movement_points(t: int, key_points, curve_type: str):
+    def calculate_movement_points(t: int, key_points, curve_type: str, easing="LINEAR"):
         if curve_type == "LINE":
             movement_points = Animations.extend_linear_movement(
                 Animations.global_points_to_local_movement(key_points), t
             )
             return movement_points
+        elif curve_type == "LINE_INTERPOLATED":
+            movement_points = Animations.interpolate_linear_movement(
+                Animations.global_points_to_local_movement(key_points), t, easing
+            )
+            return movement_points
         elif curve_type == "BEZIER":
-            # Create a numpy range for the bezier function
-            t_points = np.arange(0, 1, 1 / t)
-            # Transform the key points into a numpy array
-            movement_points = np.array(key_points)
-            # Apply the bezier curve function to the array
-            movement_points = Bezier.curve(t_points, movement_points)
+            # Apply the bezier curve function to the key points, sampled at t evenly spaced moments
+            movement_points = Bezier.uniform_curve(t, key_points)
+            # Transform the points into local movement
+            movement_points = Animations.global_points_to_local_movement(movement_points)
+            return movement_points
+        elif curve_type == "BEZIER_CONSTANT_SPEED":
+            # Sample the bezier curve at t points evenly spaced along its length
+            movement_points = Bezier.constant_speed_curve(t, key_points)
             # Transform the points into local movement
             movement_points = Animations.global_points_to_local_movement(movement_points)
             return movement_points
+        elif curve_type == "SPLINE":
+            if not isinstance(key_points, Bezier.Spline):
+                key_points = Bezier.Spline(key_points)
+            # Sample the spline at t points, split between its segments
+            movement_points = key_points.curve(t)
+            # Transform the points into local movement
+            movement_points = Animations.global_points_to_local_movement(movement_points)
+            return movement_points
+
+    # Returns a numeric NumPy array of the points, or None if they aren't a rectangular table of numbers (for example if
+    # some of the values are strings or other objects). Used for the fast paths of the movement functions below.
+    @staticmethod
+    def numeric_array(points):
+        try:
+            # NumPy would quietly turn booleans among the numbers into 0s and 1s, but the per value loops keep them
+            # as they are, so tables with booleans have to go there
+            if not isinstance(points, np.ndarray) and any(
+                isinstance(value, (bool, np.bool_)) for value in np.asarray(points, dtype=object).flat
+            ):
+                return None
+            array = np.asarray(points)
+        except (ValueError, TypeError):
+            return None
+        if array.ndim != 2 or array.dtype.kind not in "iuf":
+            return None
+        return array
+
+    # Returns whether the value can be used in movement arithmetic. Booleans don't count, NumPy numbers do.
+    @staticmethod
+    def is_number(value):
+        return isinstance(value, (int, float, np.number)) and not isinstance(value, (bool, np.bool_))
 
     # Transforms global points into local movement.
     # Example:
@@ -164,6 +427,13 @@ class Animations:
     # point animation, but you can do that with a local movement animation.
     @staticmethod
     def global_points_to_local_movement(points):
+        # If the points are a plain table of numbers, we find all the differences in one go.
+        array = Animations.numeric_array(points)
+        if array is not None:
+            local_movement = np.diff(array, axis=0)
+            # The result keeps the type of the input, because the rest of the animation code works with lists.
+            return local_movement if isinstance(points, np.ndarray) else local_movement.tolist()
+
         final_points = []
 
         # Loop through all points aside from the last one
@@ -172,9 +442,7 @@ class Animations:
             # Loop through all values inside the point (usually 2)
             for p in range(len(points[point])):
                 # If both this point's value and the next point's value is an integer or a float
-                if type(points[point][p]) in [int, float] and type(
-                        points[point + 1][p]
-                ) in [int, float]:
+                if Animations.is_number(points[point][p]) and Animations.is_number(points[point + 1][p]):
                     # We find the difference between them and save that value to next_point
                     next_point.append(points[point + 1][p] - points[point][p])
                 # Otherwise,
@@ -204,13 +472,18 @@ class Animations:
         if time < 1:
             time = 1
 
+        # If the points are a plain table of numbers, we divide and repeat them all at once.
+        array = Animations.numeric_array(points)
+        if array is not None:
+            return np.repeat((array / time)[:, np.newaxis, :], time, axis=1).tolist()
+
         # Loop through the entire list of points
         for point in points:
             next_point = []
             # Loop through all the values of each point (usually 2)
             for p in point:
                 # If we can divide that value,
-                if type(p) in [int, float]:
+                if Animations.is_number(p):
                     # we do, and append the result to the next_point list
                     next_point.append(p / time)
                 # Otherwise,
@@ -227,6 +500,46 @@ class Animations:
 
         return final_points
 
+    # Easing functions for interpolate_linear_movement. Each one maps progress through a movement (an array of numbers
+    # from 0 to 1) to how far along the way the object should be at that moment.
+    EASINGS = {
+        "LINEAR": lambda u: u,
+        "EASE_IN": lambda u: u * u,
+        "EASE_OUT": lambda u: 1 - (1 - u) * (1 - u),
+        "EASE_IN_OUT": lambda u: np.where(u < 0.5, 2 * u * u, 1 - 2 * (1 - u) * (1 - u)),
+        "CUBIC_IN": lambda u: u * u * u,
+        "CUBIC_OUT": lambda u: 1 - (1 - u) ** 3,
+        "CUBIC_IN_OUT": lambda u: np.where(u < 0.5, 4 * u ** 3, 1 - 4 * (1 - u) ** 3),
+    }
+
+    # Interpolates local movement linearly into exactly t frames of movement.
+    # Example:
+    # points = [[10, 20], [20, -10]]
+    # points interpolated into 4 frames = [[5, 10], [5, 10], [10, -5], [10, -5]]
+    # Unlike extend_linear_movement, the result always has exactly t frames, and is a flat list of frames which can be
+    # passed straight to points_to_animation. Every movement takes the same amount of time, and the easing (a name from
+    # EASINGS, or a function working on NumPy arrays) shapes how the object speeds up and slows down within each one.
+    @staticmethod
+    def interpolate_linear_movement(points, t: int = 60, easing="LINEAR"):
+        array = Animations.numeric_array(points)
+        if array is None:
+            raise TypeError("`points` Must be a list of points made of integers or floats .")
+        if isinstance(easing, str):
+            easing = Animations.EASINGS[easing]
+        if len(array) < 1 or t < 1:
+            return []
+
+        segments = len(array)
+        # Position at the start of each movement, counting from where the object started
+        positions = np.vstack((np.zeros((1, array.shape[1])), np.cumsum(array, axis=0)))
+        # Time of each frame boundary, in movements (so 1.5 is halfway through the second movement)
+        time = np.arange(t + 1) * segments / t
+        index = np.minimum(time.astype(int), segments - 1)
+        progress = easing(time - index)
+        frames = positions[index] + progress[:, np.newaxis] * array[index]
+
+        return np.diff(frames, axis=0).tolist()
+
     # Generates an empty animation shell
     # Example:
     # length = 3
@@ -282,10 +595,196 @@ class Animations:
         # Convert back to tuple and return that
         return tuple(animations)
 
+    # Converts movement points into tracks, one for each replaced value
+    # Example:
+    # points = [[10, 20], [20, -10], [-30, -10]]
+    # replaced_values = ['x', 'y']
+    # values__operations = ['+', '+']
+    # returns (Track('x', [10, 20, -30], '+'), Track('y', [20, -10, -10], '+'))
+    # The tracks do the same as the animations from points_to_animation, but go in the tracks of a game object, and take
+    # a tiny fraction of the memory.
+    @staticmethod
+    def points_to_tracks(points, replaced_values, values_operations, loop: bool = True):
+        columns = np.asarray(points, dtype="float64").reshape(-1, len(replaced_values)).T
+        return tuple(
+            Track(replaced_values[j], columns[j], values_operations[j], loop=loop)
+            for j in range(len(replaced_values))
+        )
+
+
+# Keeps scaled and rotated versions of icons, so game objects don't transform their icon on every frame. The surfaces
+# are found by the icon, the size and the angle (rounded to angle_step degrees), so objects sharing an icon share them
+# too. When the surfaces take more memory than max_bytes, the ones that weren't used for the longest are dropped.
+class SpriteCache(object):
+    # max_bytes: how much memory the cached surfaces can take, in bytes
+    # angle_step: angles are rounded to a multiple of this many degrees, so slightly different angles share a surface.
+    # 0 doesn't round them at all.
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024, angle_step: float = 1.0):
+        self.max_bytes = max_bytes
+        self.angle_step = angle_step
+        # (id of the icon, width, height, angle): (icon, surface, size in bytes), least recently used first
+        self.entries = collections.OrderedDict()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    # Rounds the angle to a multiple of angle_step, between 0 and 360.
+    def quantize_angle(self, angle):
+        if self.angle_step:
+            angle = round(angle / self.angle_step) * self.angle_step
+        return angle % 360
+
+    # Returns the icon scaled to width and height, and rotated by angle, the same as GameObject.draw used to make it.
+    def get(self, icon, width, height, angle):
+        # pygame.transform.scale cuts the size down to whole pixels anyway
+        size = (int(width), int(height))
+        angle = self.quantize_angle(angle)
+        key = (id(icon), size[0], size[1], angle)
+        entry = self.entries.get(key)
+        # The icon is checked too, because a new icon can get the id of a deleted one
+        if entry is not None and entry[0] is icon:
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+        self.misses += 1
+        image = pygame.transform.scale(icon, size)
+        image = pygame.transform.rotate(image, angle)
+        image = pygame.Surface.convert_alpha(image)
+        self.add(key, icon, image)
+        return image
+
+    # Adds a surface to the cache, and drops the least recently used ones until the cache fits in max_bytes again.
+    def add(self, key, icon, image):
+        if key in self.entries:
+            self.bytes -= self.entries.pop(key)[2]
+        size = image.get_bytesize() * image.get_width() * image.get_height()
+        # A surface bigger than the whole budget would just push everything else out
+        if size > self.max_bytes:
+            return
+        self.entries[key] = (icon, image, size)
+        self.bytes += size
+        while self.bytes > self.max_bytes:
+            self.bytes -= self.entries.popitem(last=False)[1][2]
+            self.evictions += 1
+
+    # Drops all the surfaces. The stats are kept.
+    def clear(self):
+        self.entries.clear()
+        self.bytes = 0
+
+    # Returns the share of get calls that didn't have to transform the icon, from 0 to 1.
+    def hit_rate(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    # Returns a dictionary of the numbers describing how well the cache is doing.
+    def stats(self):
+        return {
+            "entries": len(self.entries),
+            "bytes": self.bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hit_rate(),
+        }
+
+
+# All the rotations of an icon at one size, baked ahead of time into a single sprite sheet. Continuously spinning
+# objects go through new angles on every frame, so even the SpriteCache doesn't help them, but with an atlas drawing
+# them is just a blit of one of the frames. The frames are steps evenly spaced angles, starting from 0.
+class RotationAtlas(object):
+    # Atlases made by bake, so objects with the same icon, size and steps share one, least recently used first
+    # (id of the icon, width, height, steps): atlas
+    baked = collections.OrderedDict()
+    # How much memory the sheets of the atlases in baked can take, in bytes. When they take more, the least recently
+    # used ones are dropped. Game objects keep the atlases they use either way.
+    max_baked_bytes = 64 * 1024 * 1024
+    baked_bytes = 0
+
+    # icon: the icon to rotate
+    # width: width to scale the icon to before rotating it
+    # height: height to scale the icon to before rotating it
+    # steps: the number of frames, for example 64 or 128
+    def __init__(self, icon, width, height, steps: int = 64):
+        if steps < 1:
+            raise ValueError("`steps` Must be at least 1 .")
+        self.icon = icon
+        self.size = (int(width), int(height))
+        self.steps = steps
+
+        image = pygame.transform.scale(icon, self.size)
+        frames = [pygame.transform.rotate(image, i * 360 / steps) for i in range(steps)]
+        # The frames are laid out in a square grid of cells, each as big as the biggest frame
+        cell_width = max(frame.get_width() for frame in frames)
+        cell_height = max(frame.get_height() for frame in frames)
+        columns = math.ceil(math.sqrt(steps))
+        rows = math.ceil(steps / columns)
+
+        self.sheet = pygame.Surface((columns * cell_width, rows * cell_height), pygame.SRCALPHA)
+        self.sheet.fill((0, 0, 0, 0))
+        # The area of the sheet each frame is in
+        self.rects = []
+        for i, frame in enumerate(frames):
+            position = ((i % columns) * cell_width, (i // columns) * cell_height)
+            # Copies the frame exactly, alpha included, because the sheet is empty there
+            self.sheet.blit(frame, position, special_flags=pygame.BLEND_RGBA_MAX)
+            self.rects.append(pygame.Rect(position, frame.get_size()))
+        # convert_alpha only works once the window is made, and atlases are usually baked while loading
+        if pygame.display.get_surface() is not None:
+            self.sheet = self.sheet.convert_alpha()
+        self.bytes = self.sheet.get_bytesize() * self.sheet.get_width() * self.sheet.get_height()
+
+    # Returns the area of the sheet with the frame nearest to the angle.
+    def frame(self, angle):
+        return self.rects[round(angle % 360 * self.steps / 360) % self.steps]
+
+    # Returns the atlas for the icon, size and steps, only making it if it isn't in baked.
+    @staticmethod
+    def bake(icon, width, height, steps: int = 64):
+        key = (id(icon), int(width), int(height), steps)
+        atlas = RotationAtlas.baked.get(key)
+        # The icon is checked too, because a new icon can get the id of a deleted one
+        if atlas is not None and atlas.icon is icon:
+            RotationAtlas.baked.move_to_end(key)
+            return atlas
+
+        if atlas is not None:
+            RotationAtlas.baked_bytes -= RotationAtlas.baked.pop(key).bytes
+        atlas = RotationAtlas(icon, width, height, steps)
+        # An atlas bigger than the whole budget would just push everything else out
+        if atlas.bytes <= RotationAtlas.max_baked_bytes:
+            RotationAtlas.baked[key] = atlas
+            RotationAtlas.baked_bytes += atlas.bytes
+            while RotationAtlas.baked_bytes > RotationAtlas.max_baked_bytes:
+                RotationAtlas.baked_bytes -= RotationAtlas.baked.popitem(last=False)[1].bytes
+        return atlas
+
+    # Forgets all the atlases made by bake. Game objects keep the ones they already use.
+    @staticmethod
+    def clear_baked():
+        RotationAtlas.baked.clear()
+        RotationAtlas.baked_bytes = 0
+
 
 # This class is applied to any object of the game. It has the abilities of a player, anything static, anything moving,
 # basically any object you would need for your game.
 class GameObject(object):
+    # The SpriteCache draw gets the scaled and rotated icon from. Shared by all game objects, unless an object (or a
+    # subclass) is given its own.
+    sprite_cache = SpriteCache()
+
+    # The RotationAtlas draw uses when rotation_steps isn't 0. Only set by get_rotation_atlas. Set it to None to bake a
+    # new one at the current size.
+    rotation_atlas = None
+
+    # Collision axes of the hit box, and the rotated hit box they were made for. Only set by get_hit_box_axes, which
+    # keeps them up to date.
+    hit_box_axes = None
+    hit_box_axes_source = None
+
     # Initiates the object
     # Variables:
 
@@ -331,6 +830,18 @@ class GameObject(object):
 
     # counters: a tuple, containing objects of class Counter. Count down each second. Very useful while simple. Can hold
     # an additional value to help animations,
+
+    # tracks: a tuple of Track objects, applied by animate on every frame. A much lighter alternative to animations for
+    # long per frame changes, like movement along a path.
+
+    # playbacks: a tuple of Playback objects, advanced by animate on every frame. Like tracks, but the clips they play
+    # can be shared by many game objects.
+
+    # rotation_steps: if not 0, the icon is drawn from a RotationAtlas with this many rotations, baked when the object
+    # is made, instead of being rotated on every frame. The angle is rounded to the nearest of them. Great for things
+    # that keep spinning, like bullets.
+
+    # layer: the z-layer of the object. A Renderer draws objects on higher layers over those on lower ones.
     def __init__(
         self,
         x: float = 0.0,
@@ -363,7 +874,11 @@ class GameObject(object):
         weight: float = 0.5,
         animations=(),
         counters=(),
-        other_events=()
+        other_events=(),
+        tracks=(),
+        playbacks=(),
+        rotation_steps: int = 0,
+        layer: int = 0
     ):
         self.x = x
         self.y = y
@@ -392,15 +907,27 @@ class GameObject(object):
 
         self.icon = icon
         self.hit_box_color = hit_box_color
+        self.layer = layer
+        self.rotation_steps = rotation_steps
+        # Baking the atlas now, so the first frames don't have to
+        if self.icon and self.rotation_steps:
+            self.get_rotation_atlas(*self.get_image_size())
 
         self.weight = weight
 
         self.animations = animations
+        # The index of the animation that plays next.
+        self.animation_index = 0
         # play_animation is used for animations only (recurring temporal variable changes). It makes the selected
         # animation play only once until the next animation comes. This is extremely important.
         self.play_animation = True
         self.counters = counters
 
+        self.tracks = tracks
+        # The frame the tracks are on. Goes up by one every time the tracks are applied.
+        self.track_frame = 0
+        self.playbacks = playbacks
+
         self.other_events = other_events
 
         if not hit_box:
@@ -524,6 +1051,14 @@ class GameObject(object):
             except TypeError:
                 pass
 
+    # Returns the collision axes of the hit box (see ConvexPolygon.unique_axes). Moving the object doesn't change them,
+    # only changing the shape or angle of the hit box does, so they are kept until the rotated hit box changes.
+    def get_hit_box_axes(self):
+        if self.hit_box_axes is None or self.hit_box_axes_source != self.rotated_hit_box:
+            self.hit_box_axes = ConvexPolygon.unique_axes(self.rotated_hit_box)
+            self.hit_box_axes_source = self.rotated_hit_box
+        return self.hit_box_axes
+
     def evaluate_hit_box_movement(self):
         self.moved_rotated_hit_box = tuple((point[0] + self.x, point[1] + self.y) for point in self.rotated_hit_box)
 
@@ -645,17 +1180,25 @@ class GameObject(object):
                         del c
 
     def animate(self):
+        # Tracks are simply applied for the current frame, they don't need counters or temporary game objects.
+        if self.tracks:
+            for track in self.tracks:
+                track.apply(self, self.track_frame)
+            self.track_frame += 1
+        if self.playbacks:
+            for playback in self.playbacks:
+                playback.advance(self)
         # If we do have current animations (which, if we ever have animations, and none of our animations change our
         # animations, we always should have), we do the following
         if self.animations:
             # If it's time to play the animation, we do the following
             if self.play_animation:
-                # Our animation is always the first animation in a list, because it's easy that way, without having to
-                # keep track of an additional variable.
+                # Our animation is the one at animation_index, which animate_start moves along, so the animations tuple
+                # itself never has to be rebuilt.
                 # We call the function to temporarily change our variables, with time being as the first element of our
                 # animation element list, the immediate variable change as second element of our animation, and the
                 # change after counter ticks down as third element of our animation.
-                self.animations[0].execute(self)
+                self.animations[self.animation_index % len(self.animations)].execute(self)
 
     # Function to temporarily change object variables. Any of them.
     # t is time, in frames, for how long the counter will last. At the end of the counter, this game object will be
@@ -663,7 +1206,9 @@ class GameObject(object):
     def temporarily_change_variables(self, t: int, before, after):
         # We make the temporary game object initialized, so it can update. It won't update unless you intentionally
         # update it.
-        after.initialized = True
+        # (after is usually a Func, which has nothing to initialize.)
+        if isinstance(after, TempGameObject):
+            after.initialized = True
         # We make a counter for the value after, which will tick down after t frames.
         after_counter = Counter(
             count=t, change_range=[0, t + 1], change_per_second=1, value=after
@@ -675,81 +1220,138 @@ class GameObject(object):
 
         self.counters = self.counters + (after_counter,)
 
-    # Draws the game object on the surface
-    # The surface usually should be a screen
-    def draw(self, surface):
+    # Returns the width and height the icon is displayed at, offsets included.
+    def get_image_size(self):
         width = GameObject.evaluate_operation(
             self.width, self.width_offset, self.width_offset_op
         )
         height = GameObject.evaluate_operation(
             self.height, self.height_offset, self.height_offset_op
         )
+        return width, height
+
+    # Returns the RotationAtlas to draw the icon from, or None if it should come from the sprite cache instead. A new
+    # atlas is only baked when the icon or the rotation steps change. When just the size changes (for example while an
+    # animation stretches the object), baking a whole atlas on every frame would cost far more than it saves, so the
+    # sprite cache is used until the size is back to the one the atlas was baked for.
+    def get_rotation_atlas(self, width, height):
+        atlas = self.rotation_atlas
+        if atlas is None or atlas.icon is not self.icon or atlas.steps != self.rotation_steps:
+            atlas = RotationAtlas.bake(self.icon, width, height, self.rotation_steps)
+            self.rotation_atlas = atlas
+        if atlas.size != (int(width), int(height)):
+            return None
+        return atlas
+
+    # Returns what draw blits for the icon, as arguments for Surface.blit (and an item for Surface.blits):
+    # (image, position) or (image, position, area). Returns None if there is no icon.
+    # offset: position on the surface to draw as (0, 0), like the position of a Camera
+    def get_blit(self, offset=(0, 0)):
         # If we have an icon, we do the following
-        if self.icon:
-            image = pygame.transform.scale(self.icon, (width, height))
-            image = pygame.transform.rotate(image, self.angle)
-            image = pygame.Surface.convert_alpha(image)
-
-            # 2. Blit our image according to our coordinates plus offset and rotation
-            surface.blit(image, self.image_origin)
-        if True:
-            try:
-                pygame.draw.polygon(
-                    surface, self.hit_box_color, self.moved_rotated_hit_box, 1
-                )
-            # If the object is actually Temporary Game object, and some of the used variables are empty strings, we just
-            # ignore that error.
-            except TypeError:
-                pass
+        if not self.icon:
+            return None
+        width, height = self.get_image_size()
+        # Get our image rotated by the angle, either from the rotation atlas or the sprite cache, and place it according
+        # to our coordinates plus offset and rotation
+        position = (self.image_origin[0] - offset[0], self.image_origin[1] - offset[1])
+        if self.rotation_steps:
+            atlas = self.get_rotation_atlas(width, height)
+            if atlas is not None:
+                return atlas.sheet, position, atlas.frame(self.angle)
+        return self.sprite_cache.get(self.icon, width, height, self.angle), position
+
+    # Draws the outline of the hit box on the surface. Useful for debugging.
+    def draw_hit_box(self, surface, offset=(0, 0)):
+        try:
+            hit_box = self.moved_rotated_hit_box
+            if offset[0] or offset[1]:
+                hit_box = [(p[0] - offset[0], p[1] - offset[1]) for p in hit_box]
+            pygame.draw.polygon(
+                surface, self.hit_box_color, hit_box, 1
+            )
+        # If the object is actually Temporary Game object, and some of the used variables are empty strings, we just
+        # ignore that error.
+        except TypeError:
+            pass
+
+    # Draws the game object on the surface
+    # The surface usually should be a screen
+    def draw(self, surface, offset=(0, 0)):
+        blit = self.get_blit(offset)
+        if blit is not None:
+            surface.blit(*blit)
+        self.draw_hit_box(surface, offset)
+
+    # The variables that change_variables can change, in the order it changes them.
+    CHANGEABLE_VARIABLES = (
+        "angle",
+        "animation_index",
+        "animations",
+        "controls",
+        "counters",
+        "height",
+        "height_offset",
+        "height_offset_op",
+        "hit_box_color",
+        "icon",
+        "image_origin",
+        "layer",
+        "original_hit_box",
+        "play_animation",
+        "playbacks",
+        "played_sound",
+        "pressed_controls",
+        "rotated_hit_box",
+        "rotation_mode",
+        "rotation_steps",
+        "sound",
+        "sound_channel",
+        "sound_fade_in_ms",
+        "sound_loop_mode",
+        "sound_volume",
+        "speed",
+        "track_frame",
+        "tracks",
+        "width",
+        "width_offset",
+        "width_offset_op",
+        "x",
+        "x_offset",
+        "x_offset_op",
+        "y",
+        "y_offset",
+        "y_offset_op",
+    )
+
+    # Returns the changes object_replace_with makes in change_variables: a tuple of (variable, value, operation) for
+    # every variable that isn't an empty string, operation being None for variables that are simply replaced.
+    # Temporary game objects keep their changes ready (see TempGameObject.get_changes), so this is only needed for
+    # anything else.
+    @staticmethod
+    def get_variable_changes(object_replace_with):
+        changes = []
+        for var in GameObject.CHANGEABLE_VARIABLES:
+            value = getattr(object_replace_with, var)
+            if value != "":
+                changes.append((var, value, getattr(object_replace_with, var + "_operation", None)))
+        return tuple(changes)
 
     # Method to change variables with a lot of options.
     # object_replaced: Game object
     # object_replace_with: Temporary Game object
     @staticmethod
     def change_variables(object_replaced, object_replace_with):
-        all_game_object_variables = [
-            "angle",
-            "animations",
-            "controls",
-            "counters",
-            "height",
-            "height_offset",
-            "height_offset_op",
-            "hit_box_color",
-            "icon",
-            "image_origin",
-            "original_hit_box",
-            "play_animation",
-            "played_sound",
-            "pressed_controls",
-            "rotated_hit_box",
-            "rotation_mode",
-            "sound",
-            "sound_channel",
-            "sound_fade_in_ms",
-            "sound_loop_mode",
-            "sound_volume",
-            "speed",
-            "width",
-            "width_offset",
-            "width_offset_op",
-            "x",
-            "x_offset",
-            "x_offset_op",
-            "y",
-            "y_offset",
-            "y_offset_op",
-        ]
-        for var in all_game_object_variables:
-            if getattr(object_replace_with, var) != "":
-                value = getattr(object_replace_with, var)
-                if hasattr(object_replace_with, var + "_operation"):
-                    value = GameObject.evaluate_operation_between_different_types(
-                        getattr(object_replaced, var),
-                        value,
-                        getattr(object_replace_with, var + "_operation"),
-                    )
-                setattr(object_replaced, var, value)
+        if isinstance(object_replace_with, TempGameObject):
+            changes = object_replace_with.get_changes()
+        else:
+            changes = GameObject.get_variable_changes(object_replace_with)
+        # Only the variables that actually change are visited
+        for var, value, operation in changes:
+            if operation is not None:
+                value = GameObject.evaluate_operation_between_different_types(
+                    getattr(object_replaced, var), value, operation
+                )
+            setattr(object_replaced, var, value)
 
     # A function to check events for players. It will check if the window is closed, and return False accordingly,
     # and if control buttons are pressed, and set the pressed controls values accordingly
@@ -847,51 +1449,99 @@ class GameObject(object):
     #   [1, 5, '*', GameObject()]
     @staticmethod
     def evaluate_operation_between_different_types(val1, val2, operator: str):
+        return GameObject.compile_operation(type(val1), type(val2), operator)(val1, val2)
 
-        if val1 == '':
-            val1 = 0
+    # Operations already made by compile_operation, by (type of val1, type of val2, operator)
+    compiled_operations = {}
 
-        val1_type = type(val1)
-        val2_type = type(val2)
-        iters = (tuple, list)
-        nums = (int, float, bool)
+    # Returns a function doing evaluate_operation_between_different_types for values of the given types with the given
+    # operator. All the type checks are done once, here, and the function is kept for the next time it's needed. NumPy
+    # numbers count as numbers, and NumPy arrays are iterables which are combined as whole arrays.
+    @staticmethod
+    def compile_operation(val1_type, val2_type, operator: str):
+        key = (val1_type, val2_type, operator)
+        function = GameObject.compiled_operations.get(key)
+        if function is None:
+            function = GameObject.build_operation(val1_type, val2_type, operator)
+            GameObject.compiled_operations[key] = function
+        return function
 
-        return_value = val1
+    @staticmethod
+    def build_operation(val1_type, val2_type, operator: str):
+        iters = (tuple, list, np.ndarray)
+        nums = (int, float, bool, np.number)
 
-        if val1_type == bool:
-            val1 = int(val1 == True)
-        if val2_type == bool:
-            val2 = int(val2 == True)
+        if operator == '+':
+            simple = lambda a, b: a + b
+        elif operator == '*':
+            simple = lambda a, b: a * b
+        elif operator == '=':
+            simple = lambda a, b: b
+        else:
+            simple = lambda a, b: a
+
+        # Empty strings are treated as 0, and any other string is left alone
+        if issubclass(val1_type, str):
+            from_zero = GameObject.compile_operation(int, val2_type, operator)
+            return lambda a, b: from_zero(0, b) if a == '' else a
+
+        # True is treated as 1 and False as 0, and the result is turned back into a bool
+        if issubclass(val1_type, (bool, np.bool_)):
+            as_int = GameObject.compile_operation(int, val2_type, operator)
+            return lambda a, b: bool(as_int(int(a), b))
+        if issubclass(val2_type, (bool, np.bool_)):
+            with_int = GameObject.compile_operation(val1_type, int, operator)
+            return lambda a, b: with_int(a, int(b))
+
+        if issubclass(val1_type, nums):
+            if issubclass(val2_type, iters):
+                return lambda a, b: simple(a, b[0])
+            if issubclass(val2_type, nums):
+                return simple
+            return lambda a, b: a
+
+        if issubclass(val1_type, np.ndarray):
+            if operator == 'extend':
+                return lambda a, b: np.concatenate((a, np.asarray(b, dtype=a.dtype)))
+            if operator == 'replace':
+                return lambda a, b: np.asarray(b)
+            if issubclass(val2_type, nums):
+                return lambda a, b: simple(a, b)
+            if issubclass(val2_type, iters):
+                def combine(a, b):
+                    b = np.asarray(b)
+                    length = min(len(a), len(b))
+                    result = a.copy()
+                    result[:length] = simple(a[:length], b[:length])
+                    return result
+                return combine
+            return lambda a, b: a.copy()
+
+        if issubclass(val1_type, iters):
+            result_type = tuple if issubclass(val1_type, tuple) else list
+            if issubclass(val2_type, np.ndarray):
+                as_list = GameObject.compile_operation(val1_type, list, operator)
+                return lambda a, b: as_list(a, b.tolist())
+            if issubclass(val2_type, iters):
+                if operator == "extend":
+                    return lambda a, b: result_type(list(a) + list(b))
+                if operator == "replace":
+                    return (lambda a, b: tuple(b)) if result_type == tuple else (lambda a, b: b)
 
+                # Matching elements are combined, and anything past the end of the shorter one is kept from val1
+                def combine(a, b):
+                    length = min(len(a), len(b))
+                    return result_type(list(map(simple, a[:length], b[:length])) + list(a[length:]))
+                return combine
+            if issubclass(val2_type, nums):
+                return lambda a, b: result_type([simple(value, b) for value in a])
+            return lambda a, b: result_type(a)
 
+        return lambda a, b: a
 
-        if val1_type in iters:
-            return_value = list(return_value)
-            if val2_type in iters:
-                if operator == "extend":
-                    return_value.extend(val2)
-                elif operator == "replace":
-                    return_value = val2
-                else:
-                    for i in range(min(len(val1), len(val2))):
-                        return_value[i] = GameObject.evaluate_operation(
-                            return_value[i], val2[i], operator
-                        )
-            elif val2_type in nums:
-                return_value = [
-                    GameObject.evaluate_operation(val, val2, operator) for val in val1
-                ]
-            if val1_type == tuple:
-                return_value = tuple(return_value)
-        elif val1_type in nums:
-            if val2_type in iters:
-                return_value = GameObject.evaluate_operation(val1, val2[0], operator)
-            elif val2_type in nums:
-                return_value = GameObject.evaluate_operation(val1, val2, operator)
-        if val1_type == bool:
-            return_value = bool(return_value)
 
-        return return_value
+# Default of the TempGameObject arguments, telling the arguments that weren't given apart from any value that was.
+NOT_GIVEN = object()
 
 
 # class for temporary game objects. Mostly used for temporary variable changes, and animations.
@@ -899,151 +1549,424 @@ class TempGameObject(GameObject):
     # All the variables serve the same function as game object variables. They can also be empty strings, if we wish not
     # to replace that value. The _operation variables give directions to change_variables function, the operation
     # corresponding to the operation
+
+    # Default values of all the variables, shared by every temporary game object. Only the variables given to __init__
+    # are stored on the object itself.
+    x = ''
+    y = ''
+    width = ''
+    height = ''
+    x_offset = ''
+    y_offset = ''
+    width_offset = ''
+    height_offset = ''
+    x_offset_op = ''
+    y_offset_op = ''
+    width_offset_op = ''
+    height_offset_op = ''
+    speed_axis = ''
+    sound = ''
+    sound_volume = ''
+    sound_channel = ''
+    sound_loop_mode = ''
+    sound_fade_in_ms = ''
+    played_sound = ''
+    speed = ''
+    icon = ''
+    hit_box_color = ''
+    weight = ''
+    animations = ''
+    play_animation = ''
+    counters = ''
+    other_events = ''
+    original_hit_box = ''
+    image_origin = ''
+    angle = ''
+    rotation_mode = ''
+    rotated_hit_box = ''
+    moved_rotated_hit_box = ''
+    bounding_box = ''
+    controls = ''
+    pressed_controls = ''
+    tracks = ''
+    track_frame = ''
+    playbacks = ''
+    animation_index = ''
+    rotation_steps = ''
+    layer = ''
+    x_operation = '+'
+    y_operation = '+'
+    width_operation = '+'
+    height_operation = '+'
+    x_offset_operation = '+'
+    y_offset_operation = '+'
+    width_offset_operation = '+'
+    height_offset_operation = '+'
+    speed_axis_operation = '+'
+    sound_volume_operation = '+'
+    sound_channel_operation = '+'
+    sound_loop_mode_operation = '+'
+    sound_fade_in_ms_operation = '+'
+    played_sound_operation = '+'
+    speed_operation = '+'
+    hit_box_color_operation = '+'
+    weight_operation = '+'
+    animations_operation = '+'
+    play_animation_operation = '+'
+    counters_operation = '+'
+    other_events_operation = '+'
+    original_hit_box_operation = '+'
+    image_origin_operation = '+'
+    angle_operation = '+'
+    rotated_hit_box_operation = '+'
+    moved_rotated_hit_box_operation = '+'
+    bounding_box_operation = '+'
+    controls_operation = '+'
+    pressed_controls_operation = '+'
+    tracks_operation = '+'
+    track_frame_operation = '+'
+    playbacks_operation = '+'
+    animation_index_operation = '+'
+    rotation_steps_operation = '+'
+    layer_operation = '+'
+    # The initialized variable makes the temporary game object update if it's true. This is only useful for temporary
+    # game objects that update, and are in animations.
+    initialized = False
+
     def __init__(
             self,
-            x='',               # int
-            y='',               # int
-            width='',               # int
-            height='',               # int
-            x_offset='',               # int
-            y_offset='',               # int
-            width_offset='',               # int
-            height_offset='',               # int
-            x_offset_op='',               # str
-            y_offset_op='',               # str
-            width_offset_op='',               # str
-            height_offset_op='',               # str
-            speed_axis='',               # tuple
-            sound='',               # NoneType
-            sound_volume='',               # float
-            sound_channel='',               # int
-            sound_loop_mode='',               # int
-            sound_fade_in_ms='',               # int
-            played_sound='',               # bool
-            speed='',               # tuple
-            icon='',               # pygame.Surface
-            hit_box_color='',               # tuple
-            weight='',               # float
-            animations='',               # tuple
-            play_animation='',               # bool
-            counters='',               # tuple
-            other_events='',               # tuple
-            original_hit_box='',               # tuple
-            image_origin='',               # tuple
-            angle='',               # float
-            rotation_mode='',               # str
-            rotated_hit_box='',               # list
-            moved_rotated_hit_box='',               # tuple
-            bounding_box='',               # list
-            controls='',               # tuple
-            pressed_controls='',               # list
-            x_operation='+',
-            y_operation='+',
-            width_operation='+',
-            height_operation='+',
-            x_offset_operation='+',
-            y_offset_operation='+',
-            width_offset_operation='+',
-            height_offset_operation='+',
-            speed_axis_operation='+',
-            sound_volume_operation='+',
-            sound_channel_operation='+',
-            sound_loop_mode_operation='+',
-            sound_fade_in_ms_operation='+',
-            played_sound_operation='+',
-            speed_operation='+',
-            hit_box_color_operation='+',
-            weight_operation='+',
-            animations_operation='+',
-            play_animation_operation='+',
-            counters_operation='+',
-            other_events_operation='+',
-            original_hit_box_operation='+',
-            image_origin_operation='+',
-            angle_operation='+',
-            rotated_hit_box_operation='+',
-            moved_rotated_hit_box_operation='+',
-            bounding_box_operation='+',
-            controls_operation='+',
-            pressed_controls_operation='+',
+            x=NOT_GIVEN,               # int
+            y=NOT_GIVEN,               # int
+            width=NOT_GIVEN,               # int
+            height=NOT_GIVEN,               # int
+            x_offset=NOT_GIVEN,               # int
+            y_offset=NOT_GIVEN,               # int
+            width_offset=NOT_GIVEN,               # int
+            height_offset=NOT_GIVEN,               # int
+            x_offset_op=NOT_GIVEN,               # str
+            y_offset_op=NOT_GIVEN,               # str
+            width_offset_op=NOT_GIVEN,               # str
+            height_offset_op=NOT_GIVEN,               # str
+            speed_axis=NOT_GIVEN,               # tuple
+            sound=NOT_GIVEN,               # NoneType
+            sound_volume=NOT_GIVEN,               # float
+            sound_channel=NOT_GIVEN,               # int
+            sound_loop_mode=NOT_GIVEN,               # int
+            sound_fade_in_ms=NOT_GIVEN,               # int
+            played_sound=NOT_GIVEN,               # bool
+            speed=NOT_GIVEN,               # tuple
+            icon=NOT_GIVEN,               # pygame.Surface
+            hit_box_color=NOT_GIVEN,               # tuple
+            weight=NOT_GIVEN,               # float
+            animations=NOT_GIVEN,               # tuple
+            play_animation=NOT_GIVEN,               # bool
+            counters=NOT_GIVEN,               # tuple
+            other_events=NOT_GIVEN,               # tuple
+            original_hit_box=NOT_GIVEN,               # tuple
+            image_origin=NOT_GIVEN,               # tuple
+            angle=NOT_GIVEN,               # float
+            rotation_mode=NOT_GIVEN,               # str
+            rotated_hit_box=NOT_GIVEN,               # list
+            moved_rotated_hit_box=NOT_GIVEN,               # tuple
+            bounding_box=NOT_GIVEN,               # list
+            controls=NOT_GIVEN,               # tuple
+            pressed_controls=NOT_GIVEN,               # list
+            tracks=NOT_GIVEN,               # tuple
+            track_frame=NOT_GIVEN,               # int
+            playbacks=NOT_GIVEN,               # tuple
+            animation_index=NOT_GIVEN,               # int
+            rotation_steps=NOT_GIVEN,               # int
+            layer=NOT_GIVEN,               # int
+            x_operation=NOT_GIVEN,
+            y_operation=NOT_GIVEN,
+            width_operation=NOT_GIVEN,
+            height_operation=NOT_GIVEN,
+            x_offset_operation=NOT_GIVEN,
+            y_offset_operation=NOT_GIVEN,
+            width_offset_operation=NOT_GIVEN,
+            height_offset_operation=NOT_GIVEN,
+            speed_axis_operation=NOT_GIVEN,
+            sound_volume_operation=NOT_GIVEN,
+            sound_channel_operation=NOT_GIVEN,
+            sound_loop_mode_operation=NOT_GIVEN,
+            sound_fade_in_ms_operation=NOT_GIVEN,
+            played_sound_operation=NOT_GIVEN,
+            speed_operation=NOT_GIVEN,
+            hit_box_color_operation=NOT_GIVEN,
+            weight_operation=NOT_GIVEN,
+            animations_operation=NOT_GIVEN,
+            play_animation_operation=NOT_GIVEN,
+            counters_operation=NOT_GIVEN,
+            other_events_operation=NOT_GIVEN,
+            original_hit_box_operation=NOT_GIVEN,
+            image_origin_operation=NOT_GIVEN,
+            angle_operation=NOT_GIVEN,
+            rotated_hit_box_operation=NOT_GIVEN,
+            moved_rotated_hit_box_operation=NOT_GIVEN,
+            bounding_box_operation=NOT_GIVEN,
+            controls_operation=NOT_GIVEN,
+            pressed_controls_operation=NOT_GIVEN,
+            tracks_operation=NOT_GIVEN,
+            track_frame_operation=NOT_GIVEN,
+            playbacks_operation=NOT_GIVEN,
+            animation_index_operation=NOT_GIVEN,
+            rotation_steps_operation=NOT_GIVEN,
+            layer_operation=NOT_GIVEN,
     ):
-        self.x = x
-        self.y = y
-        self.width = width
-        self.height = height
-        self.x_offset = x_offset
-        self.y_offset = y_offset
-        self.width_offset = width_offset
-        self.height_offset = height_offset
-        self.x_offset_op = x_offset_op
-        self.y_offset_op = y_offset_op
-        self.width_offset_op = width_offset_op
-        self.height_offset_op = height_offset_op
-        self.speed_axis = speed_axis
-        self.sound = sound
-        self.sound_volume = sound_volume
-        self.sound_channel = sound_channel
-        self.sound_loop_mode = sound_loop_mode
-        self.sound_fade_in_ms = sound_fade_in_ms
-        self.played_sound = played_sound
-        self.speed = speed
-        self.icon = icon
-        self.hit_box_color = hit_box_color
-        self.weight = weight
-        self.animations = animations
-        self.play_animation = play_animation
-        self.counters = counters
-        self.other_events = other_events
-        self.original_hit_box = original_hit_box
-        self.image_origin = image_origin
-        self.angle = angle
-        self.rotation_mode = rotation_mode
-        self.rotated_hit_box = rotated_hit_box
-        self.moved_rotated_hit_box = moved_rotated_hit_box
-        self.bounding_box = bounding_box
-        self.controls = controls
-        self.pressed_controls = pressed_controls
-        self.x_operation = x_operation
-        self.y_operation = y_operation
-        self.width_operation = width_operation
-        self.height_operation = height_operation
-        self.x_offset_operation = x_offset_operation
-        self.y_offset_operation = y_offset_operation
-        self.width_offset_operation = width_offset_operation
-        self.height_offset_operation = height_offset_operation
-        self.speed_axis_operation = speed_axis_operation
-        self.sound_volume_operation = sound_volume_operation
-        self.sound_channel_operation = sound_channel_operation
-        self.sound_loop_mode_operation = sound_loop_mode_operation
-        self.sound_fade_in_ms_operation = sound_fade_in_ms_operation
-        self.played_sound_operation = played_sound_operation
-        self.speed_operation = speed_operation
-        self.hit_box_color_operation = hit_box_color_operation
-        self.weight_operation = weight_operation
-        self.animations_operation = animations_operation
-        self.play_animation_operation = play_animation_operation
-        self.counters_operation = counters_operation
-        self.other_events_operation = other_events_operation
-        self.original_hit_box_operation = original_hit_box_operation
-        self.image_origin_operation = image_origin_operation
-        self.angle_operation = angle_operation
-        self.rotated_hit_box_operation = rotated_hit_box_operation
-        self.moved_rotated_hit_box_operation = moved_rotated_hit_box_operation
-        self.bounding_box_operation = bounding_box_operation
-        self.controls_operation = controls_operation
-        self.pressed_controls_operation = pressed_controls_operation
-
-        # The initialized variable makes the temporary game object update if it's true. This is only useful for
-        # temporary game objects that update, and are in animations.
-        self.initialized = False
+        # A typical temporary game object only changes a couple of variables, and animations make thousands of them, so
+        # we only store the variables that were given. The rest are read from the class defaults above.
+        for name, value in locals().items():
+            if name != 'self' and value is not NOT_GIVEN:
+                setattr(self, name, value)
+
+    # Any change to the variables makes the changes prepared by get_changes outdated.
+    def __setattr__(self, name, value):
+        object.__setattr__(self, name, value)
+        if name != "changes":
+            self.__dict__.pop("changes", None)
+
+    # Returns the changes this object makes in change_variables, like GameObject.get_variable_changes. Since only the
+    # variables that were set are stored on the object, only those are looked at, and the result is kept until one of
+    # them changes.
+    def get_changes(self):
+        changes = self.__dict__.get("changes")
+        if changes is None:
+            changes = tuple(
+                (var, self.__dict__[var], getattr(self, var + "_operation", None))
+                for var in GameObject.CHANGEABLE_VARIABLES
+                if var in self.__dict__ and self.__dict__[var] != ""
+            )
+            self.changes = changes
+        return changes
 
     def update(self):
         if self.initialized:
             super().update()
 
-    def draw(self, surface):
+    def draw(self, surface, offset=(0, 0)):
+        if self.initialized:
+            super().draw(surface, offset)
+
+    def get_blit(self, offset=(0, 0)):
+        if self.initialized:
+            return super().get_blit(offset)
+        return None
+
+    def draw_hit_box(self, surface, offset=(0, 0)):
         if self.initialized:
-            super().draw(surface)
+            super().draw_hit_box(surface, offset)
+
+
+# Keeps the transforms of many game objects in contiguous NumPy arrays (structure of arrays), so hit box rotation,
+# movement and bounding boxes can be computed for all of them at once. Objects are created with World.create, and are
+# WorldGameObjects: normal game objects whose transform variables are just views into these arrays.
+class World(object):
+    # Number variables stored in the arrays, one array each
+    FIELDS = (
+        "x",
+        "y",
+        "width",
+        "height",
+        "x_offset",
+        "y_offset",
+        "width_offset",
+        "height_offset",
+        "angle",
+        "weight",
+    )
+    # Codes of the rotation modes stored in the rotation_modes array. Any other mode doesn't rotate the hit box.
+    ROTATION_MODES = ("", "AROUND", "CENTER")
+
+    # vertex_count: the number of vertices of every hit box in this world. The default hit box is a rectangle.
+    # capacity: how many objects the arrays have room for at first. They grow by themselves when needed.
+    def __init__(self, vertex_count: int = 4, capacity: int = 64):
+        self.vertex_count = vertex_count
+        self.count = 0
+        self.objects = []
+        self.arrays = {name: np.zeros(capacity, dtype="float64") for name in World.FIELDS}
+        self.rotation_modes = np.zeros(capacity, dtype="int8")
+        # The rotation modes as they were given, so modes that aren't in ROTATION_MODES read back unchanged
+        self.rotation_mode_names = np.zeros(capacity, dtype=object)
+        self.original_hit_boxes = np.zeros((capacity, vertex_count, 2), dtype="float64")
+        self.rotated_hit_boxes = np.zeros((capacity, vertex_count, 2), dtype="float64")
+        self.moved_rotated_hit_boxes = np.zeros((capacity, vertex_count, 2), dtype="float64")
+        # min x, min y, max x, max y of each object
+        self.bounding_boxes = np.zeros((capacity, 4), dtype="float64")
+
+    # Creates a WorldGameObject stored in this world. Takes the same arguments as GameObject.
+    def create(self, **kwargs):
+        return WorldGameObject(world=self, **kwargs)
+
+    # Reserves a row of the arrays for the object and returns its index.
+    def allocate(self, obj):
+        if self.count == len(self.rotation_modes):
+            self.grow(max(1, 2 * self.count))
+        self.objects.append(obj)
+        self.count += 1
+        return self.count - 1
+
+    # Makes room for `capacity` objects, keeping the current ones.
+    def grow(self, capacity: int):
+        def resized(array):
+            new_array = np.zeros((capacity,) + array.shape[1:], dtype=array.dtype)
+            new_array[: self.count] = array[: self.count]
+            return new_array
+
+        self.arrays = {name: resized(array) for name, array in self.arrays.items()}
+        self.rotation_modes = resized(self.rotation_modes)
+        self.rotation_mode_names = resized(self.rotation_mode_names)
+        self.original_hit_boxes = resized(self.original_hit_boxes)
+        self.rotated_hit_boxes = resized(self.rotated_hit_boxes)
+        self.moved_rotated_hit_boxes = resized(self.moved_rotated_hit_boxes)
+        self.bounding_boxes = resized(self.bounding_boxes)
+
+    # Removes the object from the world. The last object takes its row, so the arrays stay contiguous.
+    def remove(self, obj):
+        index = obj.world_index
+        last = self.count - 1
+        if index != last:
+            moved = self.objects[last]
+            for array in self.arrays.values():
+                array[index] = array[last]
+            for array in (
+                self.rotation_modes,
+                self.rotation_mode_names,
+                self.original_hit_boxes,
+                self.rotated_hit_boxes,
+                self.moved_rotated_hit_boxes,
+                self.bounding_boxes,
+            ):
+                array[index] = array[last]
+            self.objects[index] = moved
+            moved.world_index = index
+        self.objects.pop()
+        self.count -= 1
+        # The removed object has nowhere to keep its variables anymore, so it shouldn't be used after this.
+        obj.world_index = None
+
+    # Rotates and moves the hit boxes of all objects, and finds their bounding boxes, all as whole array operations.
+    # Does the same as evaluate_hit_box_rotation, evaluate_hit_box_movement and Polygon.get_bounding_box, for
+    # every object at once. Should be called every frame after update_objects.
+    def update(self):
+        n = self.count
+        if n == 0:
+            return
+        modes = self.rotation_modes[:n]
+        angles = np.radians(-self.arrays["angle"][:n])
+        cos = np.cos(angles)[:, np.newaxis]
+        sin = np.sin(angles)[:, np.newaxis]
+
+        # Rotation origin of each object: (0, 0) for 'AROUND', the middle of the object for 'CENTER'
+        origins = np.zeros((n, 1, 2), dtype="float64")
+        center = modes == 2
+        origins[center, 0, 0] = self.arrays["width"][:n][center] / 2
+        origins[center, 0, 1] = self.arrays["height"][:n][center] / 2
+
+        points = self.original_hit_boxes[:n] - origins
+        rotated = np.empty_like(points)
+        rotated[:, :, 0] = points[:, :, 0] * cos - points[:, :, 1] * sin
+        rotated[:, :, 1] = points[:, :, 0] * sin + points[:, :, 1] * cos
+        rotated += origins
+        # Objects with no rotation mode keep their original hit box
+        unrotated = modes == 0
+        rotated[unrotated] = self.original_hit_boxes[:n][unrotated]
+        self.rotated_hit_boxes[:n] = rotated
+
+        positions = np.stack((self.arrays["x"][:n], self.arrays["y"][:n]), axis=1)[:, np.newaxis, :]
+        moved = rotated + positions
+        self.moved_rotated_hit_boxes[:n] = moved
+        self.bounding_boxes[:n, :2] = moved.min(axis=1)
+        self.bounding_boxes[:n, 2:] = moved.max(axis=1)
+
+
+# Game object stored in a World. All variables work just like those of a normal game object, but the transform
+# variables (World.FIELDS, the rotation mode, hit boxes and bounding box) live in the world's arrays.
+class WorldGameObject(GameObject):
+    # world: the World to store the object in. The rest of the arguments are the same as those of GameObject.
+    def __init__(self, world, **kwargs):
+        self.world = world
+        # The row has to be there before GameObject.__init__ sets the variables, so if that fails, it's given back
+        self.world_index = world.allocate(self)
+        try:
+            super().__init__(**kwargs)
+        except Exception:
+            world.remove(self)
+            raise
+
+    # Same as GameObject.update, except that the hit boxes and bounding box are left to World.update.
+    def update(self):
+        for event in self.other_events:
+            event(self)
+        self.move_rotated()
+        self.evaluate_image_rotation()
+        self.update_counters()
+        self.animate()
+        self.play_sound()
+
+    @property
+    def rotation_mode(self):
+        return self.world.rotation_mode_names[self.world_index]
+
+    @rotation_mode.setter
+    def rotation_mode(self, value):
+        self.world.rotation_modes[self.world_index] = (
+            World.ROTATION_MODES.index(value) if value in World.ROTATION_MODES else 0
+        )
+        self.world.rotation_mode_names[self.world_index] = value
+
+    @property
+    def original_hit_box(self):
+        return tuple(map(tuple, self.world.original_hit_boxes[self.world_index].tolist()))
+
+    @original_hit_box.setter
+    def original_hit_box(self, value):
+        if len(value) != self.world.vertex_count:
+            raise ValueError(
+                "`hit_box` Must have " + str(self.world.vertex_count) + " vertices, like every hit box of its world ."
+            )
+        self.world.original_hit_boxes[self.world_index] = value
+
+    @property
+    def rotated_hit_box(self):
+        return tuple(map(tuple, self.world.rotated_hit_boxes[self.world_index].tolist()))
+
+    @rotated_hit_box.setter
+    def rotated_hit_box(self, value):
+        self.world.rotated_hit_boxes[self.world_index] = value
+
+    @property
+    def moved_rotated_hit_box(self):
+        return tuple(map(tuple, self.world.moved_rotated_hit_boxes[self.world_index].tolist()))
+
+    @moved_rotated_hit_box.setter
+    def moved_rotated_hit_box(self, value):
+        self.world.moved_rotated_hit_boxes[self.world_index] = value
+
+    @property
+    def bounding_box(self):
+        min_x, min_y, max_x, max_y = self.world.bounding_boxes[self.world_index].tolist()
+        return (min_x, min_y), (min_x, max_y), (max_x, max_y), (max_x, min_y)
+
+    @bounding_box.setter
+    def bounding_box(self, value):
+        points = np.asarray(value, dtype="float64")
+        self.world.bounding_boxes[self.world_index, :2] = points.min(axis=0)
+        self.world.bounding_boxes[self.world_index, 2:] = points.max(axis=0)
+
+
+# Makes a property for one of the World.FIELDS variables, reading and writing the world's array.
+def world_field(name: str):
+    def get(self):
+        return self.world.arrays[name][self.world_index].item()
+
+    def set(self, value):
+        self.world.arrays[name][self.world_index] = value
+
+    return property(get, set)
+
+
+for field_name in World.FIELDS:
+    setattr(WorldGameObject, field_name, world_field(field_name))
 
 
 # This class is for counting down. It's really simple, but useful.
@@ -1052,6 +1975,9 @@ class Counter(object):
     # change_range: list of 2 numbers, determining the minimum and maximum of the counter
     # change_per_second: the number which will be deducted each frame
     # value: variable to hold anything if needed. Useful for temporary variable changes and animations.
+    # Every animation frame makes one of these, so they don't get a __dict__
+    __slots__ = ("count", "range", "decrease", "value")
+
     def __init__(self, count, change_range, change_per_second, value):
         self.count = count
         self.range = change_range
@@ -1069,44 +1995,217 @@ class Screen(object):
     # width: width of the window
     # height: height of the window
     # color: the background color of the window
-    def __init__(self, width=300, height=300, color=(255, 255, 255)):
+    # dirty_rects: if True, draw only redraws and updates the parts of the window that changed since the last frame.
+    # Much less work for scenes where most things stand still, like menus and puzzles.
+    def __init__(self, width=300, height=300, color=(255, 255, 255), dirty_rects: bool = False):
         self.width = width
         self.height = height
         self.color = color
+        self.dirty_rects = dirty_rects
         # Create a pygame window
         self.window = pygame.display.set_mode((self.width, self.height))
+        # The part of the game world shown in the window
+        self.camera = Camera(self)
+        # The Renderer draw uses. Turn its draw_hit_boxes off to hide the hit boxes.
+        self.renderer = Renderer()
+        # What the window is cleared to, made by set_background
+        self.background = None
+        # What draw drew for each object last frame, in dirty rect mode: id of object -> (what was drawn, its area)
+        self.drawn = {}
+        # Whether the next frame has to redraw the whole window
+        self.redraw_all = True
+        self.set_background()
+
+    # Sets what the window is cleared to before drawing. If no surface is given, the window is cleared to color.
+    def set_background(self, surface=None):
+        if surface is None:
+            surface = pygame.Surface((self.width, self.height))
+            surface.fill(self.color)
+        self.background = surface.convert()
+        self.redraw_all = True
+
+    # Draws a whole frame of the objects through the camera, and updates the display.
+    def draw(self, objects):
+        if self.dirty_rects:
+            self.draw_dirty(objects)
+            return
+        self.window.blit(self.background, (0, 0))
+        draw_objects(objects, self.window, self.renderer, self.camera)
+        pygame.display.update()
+
+    # Returns what the object draws (anything that changes when it looks different) and the area of the window it draws
+    # on, or None if it draws nothing.
+    def get_drawn(self, obj, offset):
+        blit = obj.get_blit(offset)
+        rect = None
+        if blit is not None:
+            size = blit[2].size if len(blit) > 2 else blit[0].get_size()
+            rect = pygame.Rect(blit[1], size)
+        hit_box = None
+        if self.renderer.draw_hit_boxes and obj.moved_rotated_hit_box != '':
+            xs = [p[0] - offset[0] for p in obj.moved_rotated_hit_box]
+            ys = [p[1] - offset[1] for p in obj.moved_rotated_hit_box]
+            hit_box = tuple(zip(xs, ys))
+            hit_box_rect = pygame.Rect(min(xs), min(ys), max(xs) - min(xs) + 1, max(ys) - min(ys) + 1)
+            rect = hit_box_rect if rect is None else rect.union(hit_box_rect)
+        if rect is None:
+            return None
+        # A pixel of room on each side, because positions are rounded to whole pixels
+        return (blit, hit_box, obj.hit_box_color), rect.inflate(2, 2)
+
+    # Draws a frame in dirty rect mode. Only the areas of objects that changed (moved, turned, appeared or disappeared)
+    # are cleared to the background and redrawn, and only they are passed to pygame.display.update.
+    def draw_dirty(self, objects):
+        offset = self.camera.get_offset()
+        # sorted keeps the order of objects on the same layer. Temporary game objects without a layer go on layer 0.
+        objects = sorted(self.camera.visible(objects), key=lambda obj: obj.layer or 0)
+
+        previous = self.drawn
+        self.drawn = {}
+        # The objects that draw something, with their blits and areas
+        drawn_objects = []
+        blits = []
+        rects = []
+        dirty = []
+        for obj in objects:
+            drawn = self.get_drawn(obj, offset)
+            if drawn is None:
+                continue
+            self.drawn[id(obj)] = drawn
+            drawn_objects.append(obj)
+            blits.append(drawn[0][0])
+            rects.append(drawn[1])
+            old = previous.pop(id(obj), None)
+            if old is None or old[0] != drawn[0]:
+                dirty.append(drawn[1])
+                if old is not None:
+                    dirty.append(old[1])
+        # Objects drawn last frame, but not in this one
+        dirty += [rect for _, rect in previous.values()]
+
+        window_rect = self.window.get_rect()
+        if self.redraw_all:
+            dirty = [window_rect]
+            self.redraw_all = False
+        dirty = [rect.clip(window_rect) for rect in dirty]
+        dirty = [rect for rect in dirty if rect.width and rect.height]
+
+        redrawn = set()
+        for area in dirty:
+            # Everything overlapping the area is drawn again, but only inside of it, so nothing is drawn twice
+            self.window.set_clip(area)
+            self.window.blit(self.background, area, area)
+            overlapping = area.collidelistall(rects)
+            self.window.blits([blits[i] for i in overlapping if blits[i] is not None], doreturn=False)
+            redrawn.update(overlapping)
+        self.window.set_clip(None)
+        # Hit box outlines come out slightly different when clipped, so they are drawn whole. They are opaque, so
+        # drawing them again outside of the areas changes nothing there.
+        if self.renderer.draw_hit_boxes:
+            for i in sorted(redrawn):
+                drawn_objects[i].draw_hit_box(self.window, offset)
+        pygame.display.update(dirty)
+
+
+# The part of the game world shown on a screen. Objects are drawn moved by minus the position of the camera, and the
+# ones whose bounding boxes are outside of it are skipped before any work is done on their icons. Made by every Screen,
+# as screen.camera.
+class Camera(object):
+    # screen: the Screen the camera shows the world on. The camera is as big as its window.
+    # x: x coordinate of the top left corner of the camera in the world
+    # y: y coordinate of the top left corner of the camera in the world
+    # margin: how far, in pixels, outside of the camera objects still count as visible. Icons can stick out of the hit
+    # box (with offsets or a custom hit box), so this should be at least how far they do.
+    # index: an optional spatial index to find the visible static objects with, instead of checking every one of them,
+    # like a BroadPhase.BoundingVolumeTree. It must have query_rect and is_static methods. The boxes of moving objects
+    # in it can be out of date, so those are still checked one by one.
+    def __init__(self, screen, x: float = 0.0, y: float = 0.0, margin: float = 0.0, index=None):
+        self.screen = screen
+        self.x = x
+        self.y = y
+        self.margin = margin
+        self.index = index
+
+    # Returns the position on the screen to draw as (0, 0).
+    def get_offset(self):
+        return self.x, self.y
+
+    # Returns the rectangle of the world the camera sees, margin included, as min x, min y, max x, max y.
+    def get_rect(self):
+        return (
+            self.x - self.margin,
+            self.y - self.margin,
+            self.x + self.screen.width + self.margin,
+            self.y + self.screen.height + self.margin,
+        )
+
+    # Moves the camera so the point is in the middle of it.
+    def center_on(self, x: float, y: float):
+        self.x = x - self.screen.width / 2
+        self.y = y - self.screen.height / 2
+
+    # Returns the objects whose bounding boxes overlap the camera, in the order they are in.
+    def visible(self, objects):
+        rect = self.get_rect()
+        if self.index is None:
+            return self.overlapping(objects, rect)
+        found = set(map(id, self.index.query_rect(rect)))
+        static = [self.index.is_static(obj) for obj in objects]
+        found.update(map(id, self.overlapping([obj for obj, s in zip(objects, static) if not s], rect)))
+        return [obj for obj in objects if id(obj) in found]
+
+    # Returns the objects whose bounding boxes overlap the rectangle (min x, min y, max x, max y), checking every one.
+    @staticmethod
+    def overlapping(objects, rect):
+        # Temporary game objects without a bounding box are never visible
+        objects = [obj for obj in objects if obj.bounding_box != '']
+        extents = BroadPhase.box_extents(obj.bounding_box for obj in objects)
+        inside = (
+            (extents[:, 0] <= rect[2])
+            & (extents[:, 2] >= rect[0])
+            & (extents[:, 1] <= rect[3])
+            & (extents[:, 3] >= rect[1])
+        )
+        return [objects[i] for i in np.flatnonzero(inside).tolist()]
 
 
 class ConvexPolygon:
     @staticmethod
-    def collide(p1, p2):
+    def collide(p1, p2, axes1=None, axes2=None):
         """
         Return True and the MPV if the shapes collide. Otherwise, return False and
         None.
 
         p1 and p2 are lists of ordered pairs, the vertices of the polygons in the
         counterclockwise direction.
-        """
 
-        p1 = [np.array(v, "float64") for v in p1]
-        p2 = [np.array(v, "float64") for v in p2]
+        axes1 and axes2 are optional arrays of the axes to test for p1 and p2 (like
+        the ones from unique_axes). If left out, they are made from the edges.
+        """
 
-        edges = ConvexPolygon.edges_of(p1)
-        edges += ConvexPolygon.edges_of(p2)
-        orthogonals = [ConvexPolygon.orthogonal(e) for e in edges]
+        p1 = np.asarray(p1, dtype="float64")
+        p2 = np.asarray(p2, dtype="float64")
 
+        # Axes and push vectors of the edges of p1 first, then of p2, in the same order as is_separating_axis would
+        # test them one by one
         push_vectors = []
-        for o in orthogonals:
-            separates, pv = ConvexPolygon.is_separating_axis(o, p1, p2)
+        for polygon, axes in ((p1, axes1), (p2, axes2)):
+            if axes is None:
+                axes = ConvexPolygon.edge_normals(polygon)
+            separates, pv = ConvexPolygon.separating_axes(axes, p1, p2)
 
             if separates:
                 # they do not collide and there is no push vector
                 return False, None
             else:
                 push_vectors.append(pv)
+        push_vectors = np.concatenate(push_vectors)
+        # hit boxes of size 0 have no edges, so there is nothing to push them apart along
+        if len(push_vectors) == 0:
+            return False, None
 
         # they do collide and the push_vector with the smallest length is the MPV
-        mpv = min(push_vectors, key=(lambda v: np.dot(v, v)))
+        mpv = push_vectors[np.argmin(np.einsum("ij,ij->i", push_vectors, push_vectors))]
 
         # assert mpv pushes p1 away from p2
         d = ConvexPolygon.centers_displacement(p1, p2)  # direction from p1 to p2
@@ -1115,6 +2214,56 @@ class ConvexPolygon:
 
         return True, mpv
 
+    @staticmethod
+    def edge_normals(vertices):
+        """
+        Return the orthogonals of all the edges of the polygon as an (N, 2) array,
+        leaving out edges of length 0.
+
+        vertices is an (N, 2) array of the vertices of the polygon.
+        """
+        edges = np.roll(vertices, -1, axis=0) - vertices
+        axes = np.stack((-edges[:, 1], edges[:, 0]), axis=1)
+        return axes[np.any(axes != 0, axis=1)]
+
+    @staticmethod
+    def unique_axes(vertices):
+        """
+        Return the normalized orthogonals of the edges of the polygon, with
+        parallel edges sharing a single axis (so a rectangle only has 2).
+        """
+        axes = ConvexPolygon.edge_normals(np.asarray(vertices, dtype="float64"))
+        axes = axes / np.sqrt(np.einsum("ij,ij->i", axes, axes))[:, np.newaxis]
+        # opposite edges have opposite normals, so point all of them into the same half plane
+        flip = (axes[:, 0] < 0) | ((axes[:, 0] == 0) & (axes[:, 1] < 0))
+        axes[flip] = -axes[flip]
+        _, first = np.unique(np.round(axes, 9), axis=0, return_index=True)
+        return axes[np.sort(first)]
+
+    @staticmethod
+    def separating_axes(axes, p1, p2):
+        """
+        Vectorized is_separating_axis for several axes at once. Return True and
+        None if any of the axes separates p1 and p2. Otherwise, return False and
+        the push vectors of all the axes.
+
+        axes, p1 and p2 are (N, 2) arrays.
+        """
+        # project every vertex onto every axis with one matrix product per polygon
+        projections1 = p1 @ axes.T
+        projections2 = p2 @ axes.T
+        min1, max1 = projections1.min(axis=0), projections1.max(axis=0)
+        min2, max2 = projections2.min(axis=0), projections2.max(axis=0)
+
+        if not np.all((max1 >= min2) & (max2 >= min1)):
+            return True, None
+
+        d = np.minimum(max2 - min1, max1 - min2)
+        # push a bit more than needed so the shapes do not overlap in future
+        # tests due to float precision
+        d_over_o_squared = d / np.einsum("ij,ij->i", axes, axes) + 1e-10
+        return False, d_over_o_squared[:, np.newaxis] * axes
+
     @staticmethod
     def centers_displacement(p1, p2):
         """
@@ -1179,33 +2328,171 @@ class ConvexPolygon:
         else:
             return True, None
 
+    # Pushes colliding objects out of each other, the lighter one being pushed further.
+    # broad_phase: optional broad phase from the BroadPhase module (like BroadPhase.SpatialHash()), which finds the pairs
+    # of objects whose bounding boxes overlap without checking every pair. If left out, every pair is checked.
+    # batch: if True, all the pairs are tested together with collide_batch, and all the pushes applied at once. Every
+    # pair is tested against the positions from before any of the pushes, same as without batch.
     @staticmethod
-    def collide_objects_with_weight(objects):
+    def collide_objects_with_weight(objects, broad_phase=None, batch: bool = False):
+        if batch:
+            if broad_phase is not None:
+                pairs = broad_phase.pairs(objects)
+            else:
+                extents = BroadPhase.box_extents(obj.bounding_box for obj in objects)
+                pairs = BroadPhase.all_overlapping_pairs(extents)
+            ConvexPolygon.collide_pairs_with_weight(objects, pairs)
+            return
+
+        if broad_phase is not None:
+            for obj_i_1, obj_i_2 in broad_phase.pairs(objects):
+                ConvexPolygon.push_apart_with_weight(objects[obj_i_1], objects[obj_i_2])
+            return
+
         indexes = range(len(objects))
         for obj_i_1 in indexes:
             obj_1 = objects[obj_i_1]
             for obj_i_2 in indexes[obj_i_1 + 1 :]:
                 obj_2 = objects[obj_i_2]
                 if Polygon.do_boxes_overlap(obj_1.bounding_box, obj_2.bounding_box):
-                    movement = ConvexPolygon.collide(
-                        obj_1.moved_rotated_hit_box, obj_2.moved_rotated_hit_box
-                    )
-                    if movement[0]:
-                        total_percent = obj_1.weight + obj_2.weight
-                        percent_1 = obj_1.weight / total_percent
-                        percent_2 = obj_2.weight / total_percent
-                        obj_1.x += float(movement[1][0]) * percent_1
-                        obj_1.y += float(movement[1][1]) * percent_1
-                        obj_2.x -= float(movement[1][0]) * percent_2
-                        obj_2.y -= float(movement[1][1]) * percent_2
+                    ConvexPolygon.push_apart_with_weight(obj_1, obj_2)
+
+    # Batched version of push_apart_with_weight for many pairs of objects.
+    # pairs: iterable of pairs of indexes into objects
+    @staticmethod
+    def collide_pairs_with_weight(objects, pairs):
+        hit_boxes = [obj.moved_rotated_hit_box for obj in objects]
+        # Pairs are grouped by the number of vertices of their hit boxes, so each group fits into one array
+        groups = {}
+        for i, j in pairs:
+            groups.setdefault((len(hit_boxes[i]), len(hit_boxes[j])), []).append((i, j))
+
+        weights = np.array([obj.weight for obj in objects], dtype="float64")
+        push = np.zeros((len(objects), 2), dtype="float64")
+        for group in groups.values():
+            group = np.array(group, dtype="int64")
+            polygons1 = np.array([hit_boxes[i] for i in group[:, 0]], dtype="float64")
+            polygons2 = np.array([hit_boxes[j] for j in group[:, 1]], dtype="float64")
+            collided, mpv = ConvexPolygon.collide_batch(polygons1, polygons2)
+
+            group, mpv = group[collided], mpv[collided]
+            total_percent = weights[group[:, 0]] + weights[group[:, 1]]
+            # Like push_apart_with_weight, which divides by the total weight of the pair
+            if np.any(total_percent == 0):
+                raise ZeroDivisionError("The weights of two colliding objects add up to 0 .")
+            percent_1 = (weights[group[:, 0]] / total_percent)[:, np.newaxis]
+            percent_2 = (weights[group[:, 1]] / total_percent)[:, np.newaxis]
+            np.add.at(push, group[:, 0], mpv * percent_1)
+            np.add.at(push, group[:, 1], -mpv * percent_2)
+
+        for i in np.flatnonzero(np.any(push != 0, axis=1)).tolist():
+            objects[i].x += float(push[i, 0])
+            objects[i].y += float(push[i, 1])
+
+    @staticmethod
+    def collide_batch(polygons1, polygons2):
+        """
+        Batched collide for N pairs of polygons at once. Return a boolean array
+        telling which pairs collide, and an (N, 2) array of their MPVs (zero for
+        pairs that don't collide).
+
+        polygons1 is an (N, V1, 2) array and polygons2 an (N, V2, 2) array of
+        vertices, every polygon of one array having the same number of vertices.
+        """
+        polygons1 = np.asarray(polygons1, dtype="float64")
+        polygons2 = np.asarray(polygons2, dtype="float64")
+        count = len(polygons1)
+
+        edges = np.concatenate(
+            (
+                np.roll(polygons1, -1, axis=1) - polygons1,
+                np.roll(polygons2, -1, axis=1) - polygons2,
+            ),
+            axis=1,
+        )
+        axes = np.stack((-edges[:, :, 1], edges[:, :, 0]), axis=2)
+        axes_squared = np.einsum("nad,nad->na", axes, axes)
+        # edges of length 0 have no axis to test
+        valid = axes_squared > 0
+
+        # project every vertex of every polygon onto all the axes of its pair
+        projections1 = np.einsum("nvd,nad->nva", polygons1, axes)
+        projections2 = np.einsum("nvd,nad->nva", polygons2, axes)
+        min1, max1 = projections1.min(axis=1), projections1.max(axis=1)
+        min2, max2 = projections2.min(axis=1), projections2.max(axis=1)
+
+        separated = ~((max1 >= min2) & (max2 >= min1)) & valid
+        # pairs with no axes at all (hit boxes of size 0) don't collide, like in collide
+        collided = ~np.any(separated, axis=1) & np.any(valid, axis=1)
+
+        d = np.minimum(max2 - min1, max1 - min2)
+        # push a bit more than needed so the shapes do not overlap in future
+        # tests due to float precision
+        d_over_o_squared = np.divide(d, axes_squared, out=np.zeros_like(d), where=valid) + 1e-10
+        push_vectors = d_over_o_squared[:, :, np.newaxis] * axes
+        lengths = np.where(valid, np.einsum("nad,nad->na", push_vectors, push_vectors), np.inf)
+        mpv = push_vectors[np.arange(count), np.argmin(lengths, axis=1)]
+
+        # make every mpv push its first polygon away from its second
+        d = polygons2.mean(axis=1) - polygons1.mean(axis=1)
+        mpv = np.where((np.einsum("nd,nd->n", d, mpv) > 0)[:, np.newaxis], -mpv, mpv)
+        mpv[~collided] = 0
+        return collided, mpv
+
+    # Checks if the hit boxes of two objects collide, and pushes them apart according to their weights if they do.
+    @staticmethod
+    def push_apart_with_weight(obj_1, obj_2):
+        movement = ConvexPolygon.collide(
+            obj_1.moved_rotated_hit_box,
+            obj_2.moved_rotated_hit_box,
+            obj_1.get_hit_box_axes(),
+            obj_2.get_hit_box_axes(),
+        )
+        if movement[0]:
+            total_percent = obj_1.weight + obj_2.weight
+            percent_1 = obj_1.weight / total_percent
+            percent_2 = obj_2.weight / total_percent
+            obj_1.x += float(movement[1][0]) * percent_1
+            obj_1.y += float(movement[1][1]) * percent_1
+            obj_2.x -= float(movement[1][0]) * percent_2
+            obj_2.y -= float(movement[1][1]) * percent_2
+
+
+# Draws many game objects at once. Instead of blitting them one by one, it gathers the images of all of them, sorts
+# them by layer, and blits them all in a single Surface.blits call. The hit boxes are drawn afterwards, on top of
+# everything, in a separate pass that can be turned off.
+class Renderer(object):
+    # draw_hit_boxes: whether to draw the outlines of the hit boxes, for debugging
+    def __init__(self, draw_hit_boxes: bool = True):
+        self.draw_hit_boxes = draw_hit_boxes
+
+    # Draws the objects on the surface. Objects on the same layer are drawn in the order they are in.
+    # offset: position on the surface to draw as (0, 0), like the position of a Camera
+    def draw(self, objects, surface, offset=(0, 0)):
+        # sorted keeps the order of objects on the same layer. Temporary game objects without a layer go on layer 0.
+        objects = sorted(objects, key=lambda obj: obj.layer or 0)
+        blits = [blit for blit in [obj.get_blit(offset) for obj in objects] if blit is not None]
+        surface.blits(blits, doreturn=False)
+        if self.draw_hit_boxes:
+            for obj in objects:
+                obj.draw_hit_box(surface, offset)
 
 
 # function for drawing all things on a surface. Simple, but very useful.
 # things: list of game objects or temporary game objects
 # surface: the screen window
-def draw_objects(objects, surface):
+# renderer: a Renderer to draw them all at once with. If left out, they are drawn one by one.
+# camera: a Camera to draw them through. Only the objects it can see are drawn, and nothing is done for the rest.
+def draw_objects(objects, surface, renderer=None, camera=None):
+    offset = (0, 0)
+    if camera is not None:
+        objects = camera.visible(objects)
+        offset = camera.get_offset()
+    if renderer is not None:
+        renderer.draw(objects, surface, offset)
+        return
     for obj in objects:
-        obj.draw(surface)
+        obj.draw(surface, offset)
 
 
 # function for updating all things. Simple, but very useful.
@@ -1273,9 +2560,7 @@ if __name__ == "__main__":
 
         ConvexPolygon.collide_objects_with_weight([blok, man])
 
-        screen.window.fill(screen.color)
-        draw_objects(drawable_things, screen.window)
-        pygame.display.update()
+        screen.draw(drawable_things)
 
         clock.tick(60)
     pygame.quit()